@@ -1,100 +1,165 @@
-import time
-from move_checker import is_valid_move, game_is_over
-from pieces import Queen, Beetle, Spider, Ant, Grasshopper
-from settings import PIECE_WHITE
-from tile import Start_Tile
+from engine import Move, Queen, Beetle, Spider, Ant, hex_distance
+from engine.rules import (
+    valid_moves,
+    placement_destinations,
+    game_is_over,
+    movable_pieces,
+    turn_allows_move,
+)
+from engine.zobrist import SIDE_KEY, turn_key
+from transposition_table import TranspositionTable, EXACT, LOWER, UPPER
+from incremental_eval import IncrementalEvaluation
+from hexarray import count_between
+from time_manager import TimeManager, POLL_MASK, difficulty_limits, move_budget
+from opening_book import BOOK_FILE, load_book
+import parallel_search
+
+# half width of the root window around the score of two iterations before, it
+# grows fourfold on every miss and is dropped once it reaches the maximum
+ASPIRATION_WINDOW = 100
+MAX_ASPIRATION_WINDOW = 3200
+
+# width of the windows that only test whether a move beats alpha
+NULL_WINDOW = 1
+
+# plies of moves around the queens searched past the horizon, attacks once the
+# enemy queen has ATTACK_NEIGHBORS of its six neighbours and defences once our
+# own has DEFENCE_NEIGHBORS
+QUIESCENCE_DEPTH = 2
+ATTACK_NEIGHBORS = 4
+DEFENCE_NEIGHBORS = 5
 
 
 class AIPlayer:
-    def __init__(self, color, difficulty=2):
+    def __init__(self, color, difficulty=2, tt_size=1 << 18, workers=1):
         self.color = color
         self.difficulty = max(1, min(difficulty, 4))
         self.queen_placed = False
-        self.time_limit = 5 if self.difficulty == 4 else 2
-        self.max_depth = self.difficulty * 2
+
+        # max_depth and time_limit follow the difficulty unless they are set
+        self._max_depth = None
+        self._time_limit = None
+
+        # seconds left on the game clock and added to it after every move,
+        # None plays every move to time_limit
+        self.clock = None
+        self.increment = 0
+        self.timer = None  # TimeManager of the running search
+
+        # opening book played before searching, None (or "") for none, it is
+        # read the first time it is needed
+        self.book_file = BOOK_FILE
+        self.book_move = False  # whether the last move came from the book
+
+        # Search bookkeeping, a tt_size of 0 turns the transposition table off
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.nodes = 0
+        self.quiescence_nodes = 0  # the share of nodes past the horizon
+        self.out_of_time = False
+        self.depth_nodes = []  # nodes searched by each iteration
+        self.completed = []  # (depth, best move, score) of finished iterations
+        self.root_moves = None  # the moves searched at the root
+        self.pv = []  # principal variation of the deepest finished iteration
+
+        # plies of moves around the queens searched past max_depth, 0 stops
+        # at the horizon
+        self.quiescence_depth = QUIESCENCE_DEPTH
+
+        # processes searching a share of the root moves each, 1 searches here
+        self.workers = max(1, workers)
+
+        # Move ordering: two killer moves per ply and a history score per move
+        self.killers = {}
+        self.history = {}
+        self.root_pv_move = None
+
+        # Evaluation terms updated by _make_move/_undo_move during a search,
+        # check_eval compares every leaf against the full evaluation
+        self.evaluator = None
+        self.check_eval = False
 
         # Strategic piece values
         self.piece_values = {
-            Queen: 1000,
-            Beetle: 80,  # Important for attacking and covering
-            Spider: 40,  # Good for pinning pieces
-            Ant: 60,  # Excellent mobility for surrounding
-            Grasshopper: 30,
+            "Queen": 1000,
+            "Beetle": 80,  # Important for attacking and covering
+            "Spider": 40,  # Good for pinning pieces
+            "Ant": 60,  # Excellent mobility for surrounding
+            "Grasshopper": 30,
         }
 
-    def _get_valid_moves(self, state):
-        """Get all valid moves for the current state"""
-        valid_moves = []
-
-        # Special case for first move (turn 1)
-        if state.turn == 1:
-            # Find the start tile and first piece to place
-            start_tile = next(
-                tile for tile in state.board_tiles if type(tile) is Start_Tile
-            )
-            inventory = (
-                state.white_inventory
-                if self.color == PIECE_WHITE
-                else state.black_inventory
-            )
-            first_piece_tile = next(
-                tile for tile in inventory.tiles if tile.has_pieces()
-            )
-
-            if first_piece_tile and start_tile:
-                state.moving_piece = first_piece_tile.pieces[-1]
-                if is_valid_move(state, first_piece_tile, start_tile):
-                    return [(first_piece_tile, start_tile)]
-            return []
-
-        # Special case for second move (turn 2)
-        if state.turn == 2:
-            inventory = (
-                state.white_inventory
-                if self.color == PIECE_WHITE
-                else state.black_inventory
-            )
-            piece_tile = next(tile for tile in inventory.tiles if tile.has_pieces())
-            if piece_tile:
-                state.moving_piece = piece_tile.pieces[-1]
-                for board_tile in state.board_tiles:
-                    if is_valid_move(state, piece_tile, board_tile):
-                        valid_moves.append((piece_tile, board_tile))
-            return valid_moves
+    @property
+    def max_depth(self):
+        if self._max_depth is not None:
+            return self._max_depth
+        return difficulty_limits(self.difficulty)[0]
+
+    @max_depth.setter
+    def max_depth(self, value):
+        self._max_depth = value
+
+    @property
+    def time_limit(self):
+        if self._time_limit is not None:
+            return self._time_limit
+        return difficulty_limits(self.difficulty)[1]
+
+    @time_limit.setter
+    def time_limit(self, value):
+        self._time_limit = value
+
+    def _get_valid_moves(self, state, color=None):
+        """
+        Get all valid moves for the current state
+
+        :param color: Side to generate moves for, the side to move by default
+        """
+        if color is None:
+            color = state.get_current_player_color()
+        hand = state.hand(color)
+
+        # Special case for the first two moves, only open with the first piece
+        # of the hand (the start hex on turn 1, next to it on turn 2)
+        if state.turn <= 2:
+            if not hand:
+                return []
+            return [
+                Move(hand[0], None, dest)
+                for dest in placement_destinations(state, color)
+            ]
 
         # Normal move generation for later turns
-        movable_tiles = [
-            tile
-            for tile in state.get_tiles_with_pieces(include_inventory=True)
-            if tile.has_pieces() and tile.pieces[-1].color == self.color
-        ]
-
-        # Get all potential destination tiles
-        all_occupied_tiles = state.get_tiles_with_pieces()
-        potential_destinations = set()
-
-        # Add tiles adjacent to the hive
-        for tile in all_occupied_tiles:
-            for adj in tile.adjacent_tiles:
-                if not adj.has_pieces() or isinstance(tile.pieces[-1], Beetle):
-                    potential_destinations.add(adj)
+        return valid_moves(state, color)
 
-        # Check moves for each piece
-        for current_tile in movable_tiles:
-            piece = current_tile.pieces[-1]
-            state.moving_piece = piece
-
-            for dest in potential_destinations:
-                if is_valid_move(state, current_tile, dest):
-                    valid_moves.append((current_tile, dest))
+    def _make_move(self, state, move):
+        """Play move in the search, which also hands the turn to the opponent"""
+        if self.evaluator is not None:
+            self.evaluator.make(state, move)
+        else:
+            state.make(move)
 
-        return valid_moves
+    def _undo_move(self, state, move):
+        if self.evaluator is not None:
+            self.evaluator.unmake(state, move)
+        else:
+            state.unmake(move)
+
+    def _evaluate(self, state):
+        """Score of a search leaf, from the incremental terms when available"""
+        if self.evaluator is None:
+            return self._evaluate_position(state)
+
+        score = self.evaluator.evaluate(state)
+        if self.check_eval:
+            full_score = self._evaluate_position(state)
+            if score != full_score and not abs(score - full_score) < 1e-6:
+                raise AssertionError(
+                    f"incremental evaluation {score} != full evaluation {full_score}"
+                )
+        return score
 
-    def _calculate_distance(self, tile1, tile2):
-        """Calculate hexagonal distance between two tiles"""
-        q1, r1 = tile1.axial_coords
-        q2, r2 = tile2.axial_coords
-        return (abs(q1 - q2) + abs(r1 - r2) + abs(-q1 - r1 + q2 + r2)) // 2
+    def _calculate_distance(self, coords1, coords2):
+        """Calculate hexagonal distance between two hexes"""
+        return hex_distance(coords1, coords2)
 
     def _evaluate_position(self, state):
         """Evaluate the current board position"""
@@ -104,35 +169,39 @@ class AIPlayer:
         friendly_pieces = []
         enemy_pieces = []
 
+        board = state.board
+
         # Find queens and categorize pieces
-        for tile in state.get_tiles_with_pieces():
-            piece = tile.pieces[-1]
+        for coords in board.occupied():
+            piece = board.top(coords)
             if isinstance(piece, Queen):
                 if piece.color == self.color:
-                    friendly_queen = tile
+                    friendly_queen = coords
                 else:
-                    enemy_queen = tile
+                    enemy_queen = coords
 
             if piece.color == self.color:
-                friendly_pieces.append((tile, piece))
-                score += self.piece_values[type(piece)]
+                friendly_pieces.append((coords, piece))
+                score += self.piece_values[piece.name]
             else:
-                enemy_pieces.append((tile, piece))
-                score -= self.piece_values[type(piece)]
+                enemy_pieces.append((coords, piece))
+                score -= self.piece_values[piece.name]
 
         # Game ending conditions take highest priority
-        if self._is_queen_surrounded(enemy_queen):
+        if self._is_queen_surrounded(board, enemy_queen):
             return float("inf")
-        if self._is_queen_surrounded(friendly_queen):
+        if self._is_queen_surrounded(board, friendly_queen):
             return float("-inf")
 
         # Queen safety evaluation
         if friendly_queen:
-            score += self._evaluate_queen_safety(friendly_queen, True)
+            score += self._evaluate_queen_safety(board, friendly_queen, True)
         if enemy_queen:
-            score += self._evaluate_attack_potential(enemy_queen, friendly_pieces)
+            score += self._evaluate_attack_potential(
+                board, enemy_queen, friendly_pieces
+            )
             score -= (
-                self._evaluate_queen_safety(enemy_queen, False) * 0.5
+                self._evaluate_queen_safety(board, enemy_queen, False) * 0.5
             )  # Reduced defensive weight
 
         # Early game evaluation
@@ -143,23 +212,24 @@ class AIPlayer:
 
         # Position evaluation
         score += self._evaluate_piece_positions(
-            friendly_pieces, enemy_pieces, enemy_queen
+            board, friendly_pieces, enemy_pieces, enemy_queen
         )
 
         return score
 
-    def _evaluate_queen_safety(self, queen_tile, is_friendly):
+    def _evaluate_queen_safety(self, board, queen_coords, is_friendly):
         """Evaluate queen's safety"""
-        if not queen_tile:
+        if not queen_coords:
             return -1000 if is_friendly else 1000
 
         score = 0
-        surrounding_pieces = [t for t in queen_tile.adjacent_tiles if t.has_pieces()]
-        empty_spaces = [t for t in queen_tile.adjacent_tiles if not t.has_pieces()]
+        adjacent = board.neighbors(queen_coords)
+        surrounding_pieces = [c for c in adjacent if board.has_pieces(c)]
+        empty_spaces = [c for c in adjacent if not board.has_pieces(c)]
 
         num_surrounding = len(surrounding_pieces)
         friendly_surrounding = sum(
-            1 for t in surrounding_pieces if t.pieces[-1].color == self.color
+            1 for c in surrounding_pieces if board.top(c).color == self.color
         )
 
         # Safety scoring based on surrounding pieces
@@ -182,19 +252,19 @@ class AIPlayer:
 
         return score
 
-    def _evaluate_attack_potential(self, enemy_queen, friendly_pieces):
+    def _evaluate_attack_potential(self, board, enemy_queen, friendly_pieces):
         """Evaluate potential for attacking enemy queen"""
         if not enemy_queen:
             return 0
 
         score = 0
-        queen_adjacents = enemy_queen.adjacent_tiles
+        queen_adjacents = board.neighbors(enemy_queen)
 
         # Count pieces that could potentially move to surround the queen
-        for tile, piece in friendly_pieces:
+        for coords, piece in friendly_pieces:
             if isinstance(piece, Beetle):
                 # Beetles can climb, so they're especially valuable near enemy queen
-                distance = self._calculate_distance(tile, enemy_queen)
+                distance = self._calculate_distance(coords, enemy_queen)
                 if distance <= 2:
                     score += 200 / (distance + 1)
             elif isinstance(piece, Ant):
@@ -202,215 +272,499 @@ class AIPlayer:
                 score += 50
             elif isinstance(piece, Spider):
                 # Spiders are good for pinning pieces
-                distance = self._calculate_distance(tile, enemy_queen)
+                distance = self._calculate_distance(coords, enemy_queen)
                 if distance <= 3:
                     score += 100 / (distance + 1)
 
         # Extra points for controlling spaces adjacent to enemy queen
         our_adjacent_pieces = sum(
             1
-            for t in queen_adjacents
-            if t.has_pieces() and t.pieces[-1].color == self.color
+            for c in queen_adjacents
+            if board.has_pieces(c) and board.top(c).color == self.color
         )
         score += our_adjacent_pieces * 100
 
         return score
 
-    def _evaluate_piece_positions(self, friendly_pieces, enemy_pieces, enemy_queen):
+    def _evaluate_piece_positions(
+        self, board, friendly_pieces, enemy_pieces, enemy_queen
+    ):
         """Evaluate the strategic positioning of pieces"""
         score = 0
 
         if not enemy_queen:
             return score
 
-        # Reward pieces positioned between enemy pieces and their queen
-        for tile, piece in friendly_pieces:
-            if isinstance(piece, (Beetle, Spider)):
-                blocking_score = 0
-                for enemy_tile, _ in enemy_pieces:
-                    if self._is_between(tile, enemy_tile, enemy_queen):
-                        blocking_score += 50
-                score += blocking_score
+        # Reward pieces positioned between enemy pieces and their queen,
+        # every (piece, enemy) pair at once
+        blockers = [
+            coords
+            for coords, piece in friendly_pieces
+            if isinstance(piece, (Beetle, Spider))
+        ]
+        enemies = [coords for coords, _ in enemy_pieces]
+        score += 50 * count_between(blockers, enemies, enemy_queen)
 
         # Reward control of key spaces
-        for tile, piece in friendly_pieces:
-            if len([t for t in tile.adjacent_tiles if t.has_pieces()]) >= 3:
+        for coords, piece in friendly_pieces:
+            if len([c for c in board.neighbors(coords) if board.has_pieces(c)]) >= 3:
                 score += 30  # Reward pieces that help control multiple spaces
 
         return score
 
-    def _is_between(self, piece_tile, enemy_tile, queen_tile):
+    def _is_between(self, piece_coords, enemy_coords, queen_coords):
         """Check if a piece is positioned between an enemy piece and their queen"""
-        dist_total = self._calculate_distance(enemy_tile, queen_tile)
-        dist_to_piece = self._calculate_distance(enemy_tile, piece_tile)
-        dist_piece_to_queen = self._calculate_distance(piece_tile, queen_tile)
+        dist_total = self._calculate_distance(enemy_coords, queen_coords)
+        dist_to_piece = self._calculate_distance(enemy_coords, piece_coords)
+        dist_piece_to_queen = self._calculate_distance(piece_coords, queen_coords)
         return abs(dist_to_piece + dist_piece_to_queen - dist_total) <= 1
 
-    def _is_queen_surrounded(self, queen_tile):
+    def _is_queen_surrounded(self, board, queen_coords):
         """Check if a queen is surrounded"""
-        if not queen_tile:
+        if not queen_coords:
             return False
-        return len([t for t in queen_tile.adjacent_tiles if t.has_pieces()]) == 6
+        return (
+            len([c for c in board.neighbors(queen_coords) if board.has_pieces(c)]) == 6
+        )
 
-    def _minimax(self, state, depth, alpha, beta, maximizing_player, start_time):
-        """Minimax algorithm with alpha-beta pruning"""
-        if time.time() - start_time > self.time_limit:
-            return None, self._evaluate_position(state)
+    def _position_key(self, state):
+        key = state.board.hash ^ turn_key(state.turn)
+        if state.turn % 2 == 0:  # black to move
+            key ^= SIDE_KEY
+        return key
+
+    def _move_key(self, move):
+        """Identify a move across searches, where pieces of a kind are interchangeable"""
+        return (move.piece.name, move.piece.color, move.src, move.dst)
+
+    def _order_moves(self, state, moves, ply, pv_move):
+        """
+        Sort moves so the ones most likely to cause a cutoff are searched first
+
+        The previous iteration's best move for the position comes first, then
+        moves next to (or onto) the enemy queen, killer moves of this ply and
+        finally the rest by history score.
+        """
+        board = state.board
+        queens = {
+            piece.color: coords
+            for coords, piece in board.pieces()
+            if isinstance(piece, Queen)
+        }
+        pv_key = self._move_key(pv_move) if pv_move is not None else None
+        killers = self.killers.get(ply, ())
+
+        def priority(move):
+            key = self._move_key(move)
+            if key == pv_key:
+                return (0, 0)
+            enemy_queen = next(
+                (
+                    coords
+                    for color, coords in queens.items()
+                    if color != move.piece.color
+                ),
+                None,
+            )
+            if enemy_queen is not None and (
+                move.dst == enemy_queen or move.dst in board.neighbors(enemy_queen)
+            ):
+                return (1, -self.history.get(key, 0))
+            if key in killers:
+                return (2, killers.index(key))
+            return (3, -self.history.get(key, 0))
+
+        return sorted(moves, key=priority)
+
+    def _record_cutoff(self, move, depth, ply):
+        """Remember a move that refuted the position for killers and history"""
+        key = self._move_key(move)
+        killers = self.killers.setdefault(ply, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def _score(self, state, ply):
+        """_evaluate for the side to move, which is the AI at even plies"""
+        score = self._evaluate(state)
+        return score if ply % 2 == 0 else -score
+
+    def _negamax(self, state, depth, alpha, beta, ply=0):
+        """
+        Principal variation search in negamax form, returns (line, score) for
+        the side to move, the line ending early where the table answered
+        """
+        if depth == 0:
+            return self._quiescence(state, alpha, beta, ply, self.quiescence_depth)
+
+        self.nodes += 1
+        if self.nodes & POLL_MASK == 0 and self.timer.expired():
+            self.out_of_time = True
+        if self.out_of_time:
+            return [], 0
+
+        # Reuse the result of an earlier search of the same position, except at
+        # the root which may only be searching a share of the moves
+        key = self._position_key(state)
+        pv_move = None
+        if self.tt is not None and ply > 0:
+            entry = self.tt.probe(key)
+            if entry is not None:
+                pv_move = entry.move
+            if entry is not None and entry.depth >= depth:
+                line = [entry.move] if entry.move is not None else []
+                if entry.flag == EXACT:
+                    return line, entry.score
+                elif entry.flag == LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if beta <= alpha:
+                    return line, entry.score
+        alpha_orig, beta_orig = alpha, beta
 
-        if depth == 0 or game_is_over(state):
-            return None, self._evaluate_position(state)
+        if game_is_over(state):
+            return [], self._score(state, ply)
 
-        valid_moves = self._get_valid_moves(state)
+        valid_moves = self.root_moves if ply == 0 else self._get_valid_moves(state)
         if not valid_moves:
-            return None, self._evaluate_position(state)
-
-        best_move = None
-        if maximizing_player:
-            max_eval = float("-inf")
-            for move in valid_moves:
-                old_tile, new_tile = move
-                # Make move
-                piece = old_tile.pieces[-1]
-                old_tile.remove_piece()
-                new_tile.add_piece(piece)
-
-                # Recursive evaluation
-                _, eval = self._minimax(
-                    state, depth - 1, alpha, beta, False, start_time
+            if ply == 0:
+                return [], self._score(state, ply)
+
+            # a player without a legal move passes and the opponent moves again
+            self._make_move(state, None)
+            line, score = self._negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            self._undo_move(state, None)
+            return [None] + line, -score
+        if ply == 0 and self.root_pv_move is not None:
+            pv_move = self.root_pv_move
+        valid_moves = self._order_moves(state, valid_moves, ply, pv_move)
+
+        best_line = []
+        best_score = float("-inf")
+        for index, move in enumerate(valid_moves):
+            self._make_move(state, move)
+
+            # a null window needs a finite alpha to sit on
+            if index == 0 or alpha == float("-inf"):
+                line, score = self._negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                line, score = self._negamax(
+                    state, depth - 1, -alpha - NULL_WINDOW, -alpha, ply + 1
                 )
+                if alpha < -score < beta:
+                    line, score = self._negamax(
+                        state, depth - 1, -beta, -alpha, ply + 1
+                    )
+            score = -score
 
-                # Undo move
-                piece = new_tile.remove_piece()
-                old_tile.add_piece(piece)
+            self._undo_move(state, move)
+            if self.out_of_time:
+                return [], 0
 
-                if eval > max_eval:
-                    max_eval = eval
-                    best_move = move
+            if score > best_score:
+                best_score = score
+                best_line = [move] + line
 
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
+            alpha = max(alpha, score)
+            if beta <= alpha:
+                self._record_cutoff(move, depth, ply)
+                break
 
-            return best_move, max_eval
-        else:
-            min_eval = float("inf")
-            for move in valid_moves:
-                old_tile, new_tile = move
-                # Make move
-                piece = old_tile.pieces[-1]
-                old_tile.remove_piece()
-                new_tile.add_piece(piece)
-
-                # Recursive evaluation
-                _, eval = self._minimax(state, depth - 1, alpha, beta, True, start_time)
-
-                # Undo move
-                piece = new_tile.remove_piece()
-                old_tile.add_piece(piece)
-
-                if eval < min_eval:
-                    min_eval = eval
-                    best_move = move
-
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
+        if ply > 0:
+            best_move = best_line[0] if best_line else None
+            self._store(key, depth, alpha_orig, beta_orig, best_move, best_score)
+        return best_line, best_score
+
+    def _quiescence(self, state, alpha, beta, ply, depth):
+        """
+        Search _quiescence_moves past the horizon for at most depth plies, the
+        side to move may stand on the static score; returns (line, score)
+        """
+        self.nodes += 1
+        if self.nodes & POLL_MASK == 0 and self.timer.expired():
+            self.out_of_time = True
+        if self.out_of_time:
+            return [], 0
+
+        stand_pat = self._score(state, ply)
+        if depth == 0 or stand_pat >= beta or abs(stand_pat) == float("inf"):
+            return [], stand_pat
+        alpha = max(alpha, stand_pat)
+
+        best_line = []
+        best_score = stand_pat
+        for move in self._quiescence_moves(state):
+            self._make_move(state, move)
+            self.quiescence_nodes += 1
+            line, score = self._quiescence(state, -beta, -alpha, ply + 1, depth - 1)
+            score = -score
+            self._undo_move(state, move)
+            if self.out_of_time:
+                return [], 0
+
+            if score > best_score:
+                best_score = score
+                best_line = [move] + line
+            alpha = max(alpha, score)
+            if beta <= alpha:
+                break
+        return best_line, best_score
+
+    def _quiescence_moves(self, state):
+        """Moves of the side to move that change the race around the queens"""
+        board = state.board
+        color = state.get_current_player_color()
+        own_queen = enemy_queen = None
+        for coords, piece in board.pieces():
+            if isinstance(piece, Queen):
+                if piece.color == color:
+                    own_queen = coords
+                else:
+                    enemy_queen = coords
+
+        def neighbor_count(queen):
+            return sum(1 for c in board.neighbors(queen) if board.has_pieces(c))
+
+        # hexes to take next to the enemy queen and to free next to our own
+        attack = defence = set()
+        if enemy_queen is not None and neighbor_count(enemy_queen) >= ATTACK_NEIGHBORS:
+            attack = set(board.neighbors(enemy_queen))
+        if own_queen is not None and neighbor_count(own_queen) >= DEFENCE_NEIGHBORS:
+            defence = set(board.neighbors(own_queen))
+        racing = [
+            queen
+            for queen, ring in ((own_queen, defence), (enemy_queen, attack))
+            if ring
+        ]
+        if not racing:
+            return []
 
-            return best_move, min_eval
+        moves = []
+        pinned = board.pinned()
+        for piece, old in movable_pieces(state, color):
+            if old is None or old in pinned:
+                continue
+            frees = old in defence and len(board.stack(old)) == 1
+            if isinstance(piece, Beetle):
+                reach = 2
+            elif isinstance(piece, Spider):
+                reach = 4
+            else:
+                reach = None
+            if (
+                reach is not None
+                and not frees
+                and all(hex_distance(old, queen) > reach for queen in racing)
+            ):
+                continue
+            if not turn_allows_move(state, piece, old):
+                continue
+            for new in piece.destinations(board, old):
+                if (
+                    (old == own_queen and defence)
+                    or (frees and new not in defence)
+                    or (new in attack and old not in attack)
+                    or new in racing
+                ):
+                    moves.append(Move(piece, old, new))
+        return self._order_moves(state, moves, None, None)
+
+    def _aspiration_search(self, state, depth, previous):
+        """Search the root in a window around previous, widened on a miss"""
+        inf = float("inf")
+        if previous is None or abs(previous) == inf:
+            return self._negamax(state, depth, -inf, inf)
+
+        delta = ASPIRATION_WINDOW
+        alpha, beta = previous - delta, previous + delta
+        while True:
+            line, score = self._negamax(state, depth, alpha, beta)
+            if self.out_of_time:
+                return line, score
+            delta *= 4
+            if score <= alpha and alpha > -inf:
+                alpha = previous - delta if delta < MAX_ASPIRATION_WINDOW else -inf
+            elif score >= beta and beta < inf:
+                beta = previous + delta if delta < MAX_ASPIRATION_WINDOW else inf
+            else:
+                return line, score
+
+    def _store(self, key, depth, alpha, beta, best_move, score):
+        """Record a finished search in the transposition table"""
+        if self.tt is None or self.out_of_time:
+            return
+        if score <= alpha:
+            flag = UPPER
+        elif score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, score, best_move)
 
     def get_best_move(self, state):
-        """Get best move using iterative deepening"""
-        start_time = time.time()
-        valid_moves = self._get_valid_moves(state)
+        """Get best move using iterative deepening, within the move's budget"""
+        self.timer = TimeManager(
+            move_budget(self.time_limit, self.clock, self.increment, state.turn)
+        )
+        self._reset_search()
+        try:
+            valid_moves = self._get_valid_moves(state)
 
-        if not valid_moves:
-            return None, None
+            if not valid_moves:
+                return None
 
-        # For first few turns, just pick the first valid move
-        if state.turn <= 2:
-            if valid_moves:
-                old_tile, new_tile = valid_moves[0]
-                state.moving_piece = old_tile.pieces[-1]
-                return old_tile, new_tile
-            return None, None
+            move = self._book_move(state)
+            if move is not None:
+                state.moving_piece = move.piece
+                return move
+
+            # For first few turns, just pick the first valid move
+            if state.turn <= 2:
+                state.moving_piece = valid_moves[0].piece
+                return valid_moves[0]
 
-        overall_best_move = valid_moves[0]
+            overall_best_move = self._search(state, valid_moves)
+            state.moving_piece = overall_best_move.piece
+            return overall_best_move
+        finally:
+            if self.clock is not None:
+                self.clock = max(0, self.clock - self.timer.elapsed()) + self.increment
+
+    def _book_move(self, state):
+        """The opening book's move of the position, None when it has none"""
+        book = load_book(self.book_file) if self.book_file else None
+        if book is None:
+            return None
+        move = book.move(state)
+        self.book_move = move is not None
+        return move
+
+    def _search(self, state, valid_moves):
+        """Best of valid_moves, searched here or on the worker processes"""
+        if self.workers > 1 and len(valid_moves) > 1:
+            return parallel_search.best_move(self, state, valid_moves)
+        return self._iterative_deepening(state, valid_moves)
+
+    def _reset_search(self):
+        self.book_move = False
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.out_of_time = False
+        self.depth_nodes = []
+        self.completed = []
+        self.pv = []
+        self.killers = {}
+        self.history = {}
+        self.root_pv_move = None
+        if self.tt is not None:
+            self.tt.new_search()
+            self.tt.reset_stats()
+
+    def _iterative_deepening(self, state, root_moves):
+        """Deepen the search of root_moves while the next depth fits the budget"""
+        overall_best_move = self._order_moves(state, root_moves, 0, None)[0]
+        self.root_moves = root_moves
+        self.evaluator = IncrementalEvaluation(self, state)
 
-        # Iterative deepening for later turns
         for depth in range(1, self.max_depth + 1):
-            if time.time() - start_time > self.time_limit:
+            if not self.timer.next_iteration_fits():
                 break
 
-            best_move, eval = self._minimax(
-                state, depth, float("-inf"), float("inf"), True, start_time
-            )
+            nodes_before = self.nodes
+            self.timer.start_iteration()
+            previous = self.completed[-2][2] if len(self.completed) > 1 else None
+            line, score = self._aspiration_search(state, depth, previous)
+            self.depth_nodes.append(self.nodes - nodes_before)
+            if self.out_of_time:
+                break
+            self.timer.end_iteration()
 
+            best_move = self._match_move(line[0] if line else None, root_moves)
             if best_move is not None:
                 overall_best_move = best_move
+                self.pv = [best_move] + line[1:]
+
+                # search the best move of this iteration first in the next one
+                self.root_pv_move = best_move
+                self.completed.append((depth, best_move, score))
+
+        self.evaluator = None
+        self.root_moves = None
+        return overall_best_move
+
+    def _match_move(self, move, valid_moves):
+        """
+        The generated move equal to move, which may come from the
+        transposition table and hold a different piece object of the same kind
+        """
+        if move is None:
+            return None
+        for valid_move in valid_moves:
+            if (
+                valid_move.src == move.src
+                and valid_move.dst == move.dst
+                and valid_move.piece.name == move.piece.name
+            ):
+                return valid_move
+        return None
 
-        if overall_best_move:
-            state.moving_piece = overall_best_move[0].pieces[-1]
-            return overall_best_move
-
-        return None, None
+    def search_stats(self):
+        """Node and transposition table counters of the last get_best_move"""
+        stats = {
+            "nodes": self.nodes,
+            "quiescence_nodes": self.quiescence_nodes,
+            "depth_nodes": list(self.depth_nodes),
+            "depth": self.completed[-1][0] if self.completed else 0,
+            "pv": [self._move_key(move) if move else None for move in self.pv],
+            "seconds": self.timer.elapsed() if self.timer is not None else 0,
+            "book": self.book_move,
+        }
+        if self.tt is not None:
+            stats.update(self.tt.stats())
+        return stats
 
     def _find_queen_piece(self, state):
-        """Find queen piece in inventory or on board"""
-        inventory = (
-            state.white_inventory
-            if self.color == PIECE_WHITE
-            else state.black_inventory
-        )
-
-        # Check inventory first
-        for tile in inventory.tiles:
-            if (
-                tile.has_pieces()
-                and isinstance(tile.pieces[-1], Queen)
-                and tile.pieces[-1].color == self.color
-            ):
-                return tile
+        """Find queen piece in hand or on board, with its coords (None in hand)"""
+        # Check hand first
+        for piece in state.hand(self.color):
+            if isinstance(piece, Queen):
+                return piece, None
 
         # Check board
-        for tile in state.board_tiles:
-            if tile.has_pieces():
-                piece = tile.pieces[-1]
-                if isinstance(piece, Queen) and piece.color == self.color:
-                    return tile
-        return None
+        for coords in state.board.occupied():
+            piece = state.board.top(coords)
+            if isinstance(piece, Queen) and piece.color == self.color:
+                return piece, coords
+        return None, None
 
     def place_queen(self, state):
         """Place queen using position evaluation"""
-        queen_tile = self._find_queen_piece(state)
-        if not queen_tile:
-            return None, None
-
-        valid_moves = []
-        state.moving_piece = queen_tile.pieces[-1]
-
-        for new_tile in state.board_tiles:
-            if is_valid_move(state, queen_tile, new_tile):
-                valid_moves.append((queen_tile, new_tile))
+        queen, old = self._find_queen_piece(state)
+        if not queen:
+            return None
+
+        state.moving_piece = queen
+        queen_moves = [
+            move
+            for move in valid_moves(state, self.color)
+            if move.piece is queen and move.src == old
+        ]
 
-        if not valid_moves:
-            return None, None
+        if not queen_moves:
+            return None
 
-        best_move = valid_moves[0]
+        best_move = queen_moves[0]
         best_score = float("-inf")
 
-        for move in valid_moves:
-            old_tile, new_tile = move
-            # Make move
-            piece = old_tile.pieces[-1]
-            old_tile.remove_piece()
-            new_tile.add_piece(piece)
+        for move in queen_moves:
+            self._make_move(state, move)
 
             # Evaluate position
             score = self._evaluate_position(state)
 
-            # Undo move
-            piece = new_tile.remove_piece()
-            old_tile.add_piece(piece)
+            self._undo_move(state, move)
 
             if score > best_score:
                 best_score = score
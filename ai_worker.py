@@ -0,0 +1,38 @@
+"""
+Background AI search
+
+get_best_move runs in a worker thread on a snapshot of the game, so the
+pygame loop keeps drawing and handling events while the AI thinks. The main
+loop starts an AISearch and polls it once per frame.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-search")
+    return _executor
+
+
+class AISearch:
+    """Future-style handle of one AI move search"""
+
+    def __init__(self, ai, state):
+        self.ai = ai
+        self.turn = state.turn
+        self.future = _get_executor().submit(ai.get_best_move, state.snapshot())
+
+    def done(self):
+        return self.future.done()
+
+    def is_stale(self, state):
+        """The game moved on (e.g. a new game was started) since the search began"""
+        return state.turn != self.turn
+
+    def result(self):
+        """The Move found, or None to skip the turn, raises what the search raised"""
+        return self.future.result()
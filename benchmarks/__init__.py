@@ -0,0 +1 @@
+"""Headless benchmarks, run them from the repository root with python -m"""
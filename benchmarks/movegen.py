@@ -0,0 +1,78 @@
+"""
+Move generation benchmark on mid-game positions
+
+    python -m benchmarks.movegen [--positions 8] [--repeat 5] [--budget-ms 50]
+
+Times the full move generator and the single move check the UI runs when a
+piece is dropped (path_exists for every ant and spider against every hex
+next to the hive). Exits with status 1 when the average move generation
+time goes over --budget-ms, so it can guard against slow regressions.
+"""
+
+import argparse
+import sys
+import time
+from engine import Ant, Spider, valid_moves
+from engine.movement import path_exists
+from engine.rules import candidate_destinations
+from benchmarks.positions import midgame_positions, pieces_on_board
+
+
+def _time(function, repeat):
+    """Best of repeat runs in milliseconds, and the last result"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def _check_all_slides(game):
+    board = game.board
+    destinations = candidate_destinations(game)
+    checks = 0
+    for coords in board.occupied():
+        piece = board.top(coords)
+        if len(board.stack(coords)) > 1 or not isinstance(piece, (Ant, Spider)):
+            continue
+        for new in destinations:
+            path_exists(board, coords, new, spider=isinstance(piece, Spider))
+            checks += 1
+    return checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positions", type=int, default=8)
+    parser.add_argument("--min-pieces", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    positions = midgame_positions(args.positions, args.min_pieces)
+    print(
+        f"{'position':>8} {'pieces':>6} {'moves':>6} {'movegen ms':>11}"
+        f" {'checks':>7} {'checks ms':>10}"
+    )
+
+    total_movegen = 0
+    for index, game in enumerate(positions):
+        movegen_ms, moves = _time(lambda: valid_moves(game), args.repeat)
+        checks_ms, checks = _time(lambda: _check_all_slides(game), args.repeat)
+        total_movegen += movegen_ms
+        print(
+            f"{index:>8} {pieces_on_board(game):>6} {len(moves):>6}"
+            f" {movegen_ms:>11.2f} {checks:>7} {checks_ms:>10.2f}"
+        )
+
+    average = total_movegen / len(positions)
+    print(f"average move generation: {average:.2f} ms")
+    if args.budget_ms is not None and average > args.budget_ms:
+        print(f"over the budget of {args.budget_ms:.2f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Parallel search benchmark
+
+    python -m benchmarks.parallel [--workers 1 2 4] [--time-limit 5] [--positions 4]
+
+Runs a time limited search of every mid-game position with each worker count
+and reports nodes per second and the depth every worker finished.
+"""
+
+import argparse
+import os
+import time
+from ai_player import AIPlayer
+from benchmarks.positions import midgame_positions
+import parallel_search
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    parser.add_argument("--time-limit", type=float, default=5)
+    parser.add_argument("--max-depth", type=int, default=20)
+    parser.add_argument("--positions", type=int, default=4)
+    parser.add_argument("--min-pieces", type=int, default=14)
+    args = parser.parse_args(argv)
+
+    positions = midgame_positions(args.positions, args.min_pieces)
+    print(f"{'workers':>7} {'nodes':>9} {'seconds':>8} {'nodes/s':>9} {'depths':>12}")
+    for workers in sorted(set(args.workers)):
+        nodes = 0
+        seconds = 0
+        depths = []
+        for game in positions:
+            ai = AIPlayer(game.get_current_player_color(), workers=workers)
+            ai.time_limit = args.time_limit
+            ai.max_depth = args.max_depth
+
+            # start the pool outside of the timed search
+            if workers > 1:
+                parallel_search.start(workers)
+
+            start = time.perf_counter()
+            ai.get_best_move(game)
+            seconds += time.perf_counter() - start
+            nodes += ai.nodes
+            depths.append(ai.search_stats()["depth"])
+        print(
+            f"{workers:>7} {nodes:>9} {seconds:>8.2f} {nodes / seconds:>9.0f}"
+            f" {' '.join(map(str, depths)):>12}"
+        )
+    parallel_search.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Perft: count the legal move sequences from canonical positions
+
+    python -m benchmarks.perft [--depth 3] [--position midgame] [--update]
+
+The positions and the expected number of sequences at each depth are stored
+in perft.json next to this file. Counts that differ from the stored ones are
+reported and the tool exits with status 1, so rule regressions in the move
+generator are caught. nodes/s gives a stable throughput number to compare
+move generator changes against. --update stores the current counts.
+
+A player without a legal move passes (which counts as one move) and a
+finished game has no moves.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from engine import Game, valid_moves, game_is_over
+
+POSITIONS_FILE = os.path.join(os.path.dirname(__file__), "perft.json")
+
+
+def perft(game, depth):
+    """Number of move sequences of length depth from game"""
+    if depth == 0:
+        return 1
+    if game_is_over(game):
+        return 0
+    moves = valid_moves(game) or [None]
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        game.make(move)
+        nodes += perft(game, depth - 1)
+        game.unmake(move)
+    return nodes
+
+
+def load_positions(path=POSITIONS_FILE):
+    with open(path) as positions_file:
+        return json.load(positions_file)["positions"]
+
+
+def save_positions(positions, path=POSITIONS_FILE):
+    """Write the positions with one move per line, so diffs stay readable"""
+    blocks = []
+    for position in positions:
+        moves = "".join(f"\n   {json.dumps(move)}," for move in position["moves"])
+        blocks.append(
+            f'  {{"name": {json.dumps(position["name"])},\n'
+            f'   "counts": {json.dumps(position.get("counts", []))},\n'
+            f'   "moves": [{moves.rstrip(",")}]}}'
+        )
+    with open(path, "w") as positions_file:
+        positions_file.write('{"positions": [\n' + ",\n".join(blocks) + "\n]}\n")
+
+
+def build_game(moves):
+    """Play a list of [piece name, src, dst] moves from the start"""
+    game = Game()
+    for name, src, dst in moves:
+        src = tuple(src) if src is not None else None
+        dst = tuple(dst)
+        move = next(
+            (
+                move
+                for move in valid_moves(game)
+                if move.piece.name == name and move.src == src and move.dst == dst
+            ),
+            None,
+        )
+        if move is None:
+            raise ValueError(f"illegal move {name} {src} -> {dst} on turn {game.turn}")
+        game.make(move)
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=None, help="deepest depth")
+    parser.add_argument("--position", action="append", help="only these positions")
+    parser.add_argument("--update", action="store_true", help="store the counts")
+    args = parser.parse_args(argv)
+
+    positions = load_positions()
+    failed = False
+    total_nodes = 0
+    total_seconds = 0
+    for position in positions:
+        if args.position and position["name"] not in args.position:
+            continue
+        game = build_game(position["moves"])
+        expected = position.get("counts", [])
+        depth = args.depth or max(len(expected), 1)
+
+        counts = []
+        for current in range(1, depth + 1):
+            start = time.perf_counter()
+            nodes = perft(game, current)
+            seconds = time.perf_counter() - start
+            counts.append(nodes)
+            total_nodes += nodes
+            total_seconds += seconds
+
+            status = ""
+            if current <= len(expected) and expected[current - 1] != nodes:
+                status = f"  expected {expected[current - 1]}"
+                failed = True
+            print(
+                f"{position['name']:>12} depth {current}: {nodes:>9}"
+                f" {seconds:>8.2f}s {nodes / seconds if seconds else 0:>9.0f} nodes/s"
+                f"{status}"
+            )
+        if args.update:
+            position["counts"] = counts
+
+    if total_seconds:
+        print(f"total {total_nodes} nodes, {total_nodes / total_seconds:.0f} nodes/s")
+    if args.update:
+        save_positions(positions)
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import random
+from engine import Game, valid_moves, game_is_over
+
+
+def _sort_key(move):
+    return (move.piece.name, str(move.src), move.dst)
+
+
+def pieces_on_board(game):
+    return sum(len(game.board.stack(coords)) for coords in game.board.occupied())
+
+
+def midgame_positions(count=8, min_pieces=20, max_plies=80):
+    """
+    Reproducible positions with at least min_pieces on the board
+
+    Each seed is played until enough pieces are down, seeds whose game ends
+    (or runs out of plies) before that are skipped.
+    """
+    positions = []
+    seed = 0
+    while len(positions) < count:
+        rnd = random.Random(seed)
+        game = Game()
+        for _ in range(max_plies):
+            if pieces_on_board(game) >= min_pieces:
+                positions.append(game)
+                break
+            moves = sorted(valid_moves(game), key=_sort_key)
+            if not moves:
+                game.next_turn()
+                continue
+            game.play(rnd.choice(moves))
+            if game_is_over(game):
+                break
+        seed += 1
+    return positions
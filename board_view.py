@@ -0,0 +1,92 @@
+"""
+Retained drawing of the game screen
+
+The inventories, tiles and turn panel are drawn on a surface that is kept
+between frames. Every frame only the tiles whose colour, top piece or hover
+state changed are drawn again, those rectangles are copied to the screen and
+only they are updated on the display, so an idle board costs next to nothing.
+"""
+
+import pygame as pg
+from tile import draw_drag
+from settings import BACKGROUND
+
+
+def tile_rect(tile):
+    """Screen area a tile draws on, the hover outline and the piece included"""
+    xs = [x for x, _ in tile.hex_select]
+    ys = [y for _, y in tile.hex_select]
+    left, top = int(min(xs)), int(min(ys))
+    rect = pg.Rect(left, top, int(max(xs)) - left + 1, int(max(ys)) - top + 1)
+    return rect.inflate(4, 4)
+
+
+class Board_View:
+
+    def __init__(self, screen, tiles, inventories, turn_panel):
+        self.screen = screen
+        self.surface = pg.Surface(screen.get_size())
+        self.tiles = tiles
+        self.inventories = inventories
+        self.turn_panel = turn_panel
+        self.tile_rects = [tile_rect(tile) for tile in tiles]
+        self.looks = [None] * len(tiles)  # what each tile showed when drawn
+        self.turn = None
+        self.drag_rect = None
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Draw everything next frame, e.g. after a menu drew over the screen"""
+        self.full_redraw = True
+
+    def _look(self, tile, hovered, clicked):
+        top = tile.pieces[-1] if tile.pieces else None
+        return (tile.color, id(top), tile is hovered, tile is hovered and clicked)
+
+    def _redraw(self, rect, pos, hovered, clicked, turn):
+        """Draw the area of rect in the same order as a full redraw would"""
+        self.surface.set_clip(rect)
+        self.surface.fill(BACKGROUND)
+        for inventory in self.inventories:
+            inventory.draw(self.surface, pos)
+        for index in rect.collidelistall(self.tile_rects):
+            tile = self.tiles[index]
+            tile.draw(self.surface, pos, clicked, tile is hovered)
+        self.turn_panel.draw(self.surface, turn)
+        self.surface.set_clip(None)
+
+    def draw(self, pos, hovered, clicked, turn, moving_piece=None):
+        """
+        Bring the screen up to date and return the number of areas updated
+
+        hovered is the tile under the mouse (or None), found by the caller
+        """
+        dirty = []
+        for index, tile in enumerate(self.tiles):
+            look = self._look(tile, hovered, clicked)
+            if look != self.looks[index]:
+                self.looks[index] = look
+                dirty.append(self.tile_rects[index])
+        if turn != self.turn:
+            self.turn = turn
+            dirty.append(self.turn_panel.back_panel)
+
+        if self.full_redraw:
+            self.full_redraw = False
+            dirty = [self.surface.get_rect()]
+        for rect in dirty:
+            self._redraw(rect, pos, hovered, clicked, turn)
+
+        # the drag line is drawn on the screen only, so it's erased by copying
+        # the board back over where it was
+        if self.drag_rect is not None:
+            dirty.append(self.drag_rect)
+        for rect in dirty:
+            self.screen.blit(self.surface, rect, rect)
+        self.drag_rect = None
+        if moving_piece is not None:
+            self.drag_rect = draw_drag(self.screen, pos, moving_piece).inflate(2, 2)
+            dirty.append(self.drag_rect)
+
+        pg.display.update(dirty)
+        return len(dirty)
@@ -0,0 +1,34 @@
+"""
+Headless Hive rules engine
+
+Only depends on the standard library (and the plain constants in settings),
+so it can be used by self-play workers and analysis jobs without pygame.
+"""
+
+from engine.board import Board, START, axial_distance, is_straight_line
+from engine.hexgrid import (
+    DIRECTIONS,
+    neighbor_table,
+    hex_distance,
+    are_neighbors,
+    hex_round,
+)
+from engine.game import Game, Move
+from engine.position import Position
+from engine.pieces import (
+    Piece,
+    Queen,
+    Ant,
+    Spider,
+    Beetle,
+    Grasshopper,
+    STARTING_PIECES,
+    starting_hand,
+)
+from engine.rules import (
+    is_valid_move,
+    valid_moves,
+    iter_valid_moves,
+    game_is_over,
+    player_has_no_moves,
+)
@@ -0,0 +1,151 @@
+from engine.hexgrid import UNBOUNDED, neighbor_table, hex_distance
+from engine.zobrist import board_hash, piece_key
+
+# the first piece of the game is always placed here
+START = (0, 0)
+
+
+class Board:
+    """
+    Stacks of pieces keyed by axial (q, r) coordinates
+
+    A board built without stacks is unbounded and creates stacks on demand.
+    A board built from a mapping of stacks (e.g. the lists held by the
+    pygame tiles) is limited to those coordinates and shares the lists.
+
+    The set of occupied coordinates is kept up to date by add_piece and
+    remove_piece, so occupancy queries cost O(pieces) rather than O(grid).
+    The Zobrist hash of the position is updated there as well. Stacks must
+    only be changed through those two methods.
+    """
+
+    def __init__(self, stacks=None, start=START):
+        self.bounded = stacks is not None
+        self.stacks = dict(stacks) if stacks is not None else {}
+        self.start = start
+        self.occupied_cells = {coords for coords, stack in self.stacks.items() if stack}
+        self.hash = board_hash(self)
+        self.neighbor_table = neighbor_table(self.stacks) if self.bounded else UNBOUNDED
+
+        # pinned hexes, cached together with the hash they were computed for
+        self._pinned = None
+        self._pinned_hash = None
+
+    def on_board(self, coords):
+        return not self.bounded or coords in self.stacks
+
+    def neighbors(self, coords):
+        try:
+            return self.neighbor_table[coords]
+        except KeyError:  # off a bounded board
+            return tuple(x for x in UNBOUNDED[coords] if self.on_board(x))
+
+    def stack(self, coords):
+        return self.stacks.get(coords, ())
+
+    def has_pieces(self, coords):
+        return coords in self.occupied_cells
+
+    def top(self, coords):
+        stack = self.stacks.get(coords)
+        if stack:
+            return stack[-1]
+        return None
+
+    def add_piece(self, coords, piece):
+        stack = self.stacks.setdefault(coords, [])
+        stack.append(piece)
+        self.occupied_cells.add(coords)
+        self.hash ^= piece_key(piece, len(stack), coords)
+
+    def remove_piece(self, coords):
+        stack = self.stacks[coords]
+        self.hash ^= piece_key(stack[-1], len(stack), coords)
+        piece = stack.pop(-1)
+        if not stack:
+            self.occupied_cells.discard(coords)
+        return piece
+
+    def occupied(self):
+        """Coordinates of every stack that holds at least one piece"""
+        return list(self.occupied_cells)
+
+    def pieces(self):
+        """Yield (coords, piece) for every piece on the board, buried ones included"""
+        for coords in self.occupied():
+            for piece in self.stacks[coords]:
+                yield coords, piece
+
+    def pinned(self):
+        """
+        Hexes whose top piece can't leave without splitting the hive
+
+        These are the articulation points of the hive among single-piece
+        stacks, found with one Tarjan pass. The result is reused until the
+        position (its hash) changes, so temporarily lifting a piece and putting
+        it back does not throw it away.
+        """
+        if self._pinned is None or self._pinned_hash != self.hash:
+            self._pinned = frozenset(
+                coords
+                for coords in articulation_points(self)
+                if len(self.stacks[coords]) == 1
+            )
+            self._pinned_hash = self.hash
+        return self._pinned
+
+    def is_hive_adjacent(self, coords):
+        for neighbor in self.neighbors(coords):
+            if self.has_pieces(neighbor):
+                return True
+        return False
+
+
+def articulation_points(board):
+    """Occupied hexes that disconnect the hive when emptied (iterative Tarjan)"""
+    occupied = board.occupied_cells
+    points = set()
+    if not occupied:
+        return points
+
+    root = next(iter(occupied))
+    discovery = {root: 0}
+    low = {root: 0}
+    root_children = 0
+    # each frame: hex, parent, iterator over its occupied neighbours
+    stack = [(root, None, iter(board.neighbors(root)))]
+    while stack:
+        coords, parent, neighbors = stack[-1]
+        for neighbor in neighbors:
+            if neighbor not in occupied:
+                continue
+            if neighbor not in discovery:
+                discovery[neighbor] = low[neighbor] = len(discovery)
+                stack.append((neighbor, coords, iter(board.neighbors(neighbor))))
+                break
+            elif neighbor != parent:
+                low[coords] = min(low[coords], discovery[neighbor])
+        else:
+            stack.pop()
+            if parent is None:
+                continue
+            low[parent] = min(low[parent], low[coords])
+            if parent == root:
+                root_children += 1
+            elif low[coords] >= discovery[parent]:
+                points.add(parent)
+
+    if root_children > 1:
+        points.add(root)
+    return points
+
+
+# steps between two hexes, the rules compare it to 1 to find neighbours
+axial_distance = hex_distance
+
+
+def is_straight_line(old_coords, new_coords):
+    (q1, r1) = old_coords
+    (q2, r2) = new_coords
+
+    return q1 == q2 or r1 == r2 or -q1 - r1 == -q2 - r2
@@ -0,0 +1,92 @@
+from collections import namedtuple
+from engine.board import Board
+from engine.pieces import starting_hand
+from settings import PIECE_WHITE, PIECE_BLACK
+
+# src is None when the piece is placed from the hand
+Move = namedtuple("Move", ["piece", "src", "dst"])
+
+
+class Game:
+    """Headless game: the board, both players' hands and the turn counter"""
+
+    def __init__(self, board=None, hands=None, turn=1):
+        self.board = board if board is not None else Board()
+        self.hands = (
+            hands
+            if hands is not None
+            else {
+                PIECE_WHITE: starting_hand(PIECE_WHITE),
+                PIECE_BLACK: starting_hand(PIECE_BLACK),
+            }
+        )
+        self.turn = turn
+        self.winner = None
+
+    def get_current_player_color(self):
+        """
+        Determine the current player's color based on the turn
+        """
+        return PIECE_WHITE if self.turn % 2 == 1 else PIECE_BLACK
+
+    def snapshot(self):
+        """
+        Headless copy of the position, e.g. to search on in another thread
+
+        Pieces are shared with this game, the stacks and hands are copied.
+        """
+        board = Board(
+            (
+                {coords: [] for coords in self.board.stacks}
+                if self.board.bounded
+                else None
+            ),
+            start=self.board.start,
+        )
+        for coords in self.board.occupied():
+            for piece in self.board.stack(coords):
+                board.add_piece(coords, piece)
+        hands = {color: list(self.hand(color)) for color in (PIECE_WHITE, PIECE_BLACK)}
+        return Game(board=board, hands=hands, turn=self.turn)
+
+    def hand(self, color):
+        """Pieces the player can still place"""
+        return self.hands[color]
+
+    def remove_from_hand(self, piece):
+        self.hands[piece.color].remove(piece)
+
+    def add_to_hand(self, piece):
+        self.hands[piece.color].append(piece)
+
+    def play(self, move):
+        """Apply a move and pass the turn to the other player"""
+        self.make(move)
+
+    def make(self, move):
+        """
+        Apply a move and advance the turn (and so the side to move)
+
+        A move of None passes, for players left without a legal move.
+        unmake(move) restores the position exactly, hash included.
+        """
+        if move is not None:
+            if move.src is None:
+                self.remove_from_hand(move.piece)
+            else:
+                self.board.remove_piece(move.src)
+            self.board.add_piece(move.dst, move.piece)
+        self.turn += 1
+
+    def unmake(self, move):
+        """Take back a move applied with make"""
+        self.turn -= 1
+        if move is not None:
+            self.board.remove_piece(move.dst)
+            if move.src is None:
+                self.add_to_hand(move.piece)
+            else:
+                self.board.add_piece(move.src, move.piece)
+
+    def next_turn(self):
+        self.turn += 1
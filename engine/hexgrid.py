@@ -0,0 +1,105 @@
+"""
+Neighbour tables and coordinate helpers for hex grids
+
+Neighbours are looked up far more often than anything else the rules do, so
+they are computed once per grid instead of on every call. Tables are cached
+at module level and shared by every board (and game) built on the same
+cells, worker processes build them once on first use.
+"""
+
+# axial offsets of the six neighbouring hexes
+DIRECTIONS = ((0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0))
+_DIRECTION_SET = frozenset(DIRECTIONS)
+
+# the twelve symmetries of the grid around (0, 0) as 2x2 matrices acting on
+# axial (q, r): the six turns by 60 degrees, each with and without a mirroring
+_TURN = ((0, -1), (1, 1))
+_MIRROR = ((0, 1), (1, 0))
+
+_tables = {}
+
+
+def neighbor_table(cells):
+    """
+    Map every hex of cells to a tuple of its neighbours that are also in cells
+
+    Built in O(n) with the six direction offsets, tables for the same set of
+    cells are only built once.
+    """
+    cells = frozenset(cells)
+    table = _tables.get(cells)
+    if table is None:
+        table = _tables[cells] = {
+            (q, r): tuple(
+                (q + dq, r + dr) for (dq, dr) in DIRECTIONS if (q + dq, r + dr) in cells
+            )
+            for (q, r) in cells
+        }
+    return table
+
+
+class UnboundedNeighbors(dict):
+    """Neighbour table of the infinite grid, filled in as hexes are visited"""
+
+    def __missing__(self, coords):
+        (q, r) = coords
+        neighbors = self[coords] = tuple((q + dq, r + dr) for (dq, dr) in DIRECTIONS)
+        return neighbors
+
+
+UNBOUNDED = UnboundedNeighbors()
+
+
+def hex_distance(one, two):
+    """Number of steps between two hexes, 1 for neighbours"""
+    dq = one[0] - two[0]
+    dr = one[1] - two[1]
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+
+def are_neighbors(one, two):
+    """hex_distance(one, two) == 1, without computing the distance"""
+    return (two[0] - one[0], two[1] - one[1]) in _DIRECTION_SET
+
+
+def _compose(one, two):
+    """Matrix of applying two and then one"""
+    ((a, b), (c, d)), ((e, f), (g, h)) = one, two
+    return ((a * e + b * g, a * f + b * h), (c * e + d * g, c * f + d * h))
+
+
+def transform(coords, matrix):
+    """coords under a symmetry of SYMMETRIES"""
+    ((a, b), (c, d)) = matrix
+    (q, r) = coords
+    return (a * q + b * r, c * q + d * r)
+
+
+def inverse(matrix):
+    """The symmetry undoing matrix, which has a determinant of 1 or -1"""
+    ((a, b), (c, d)) = matrix
+    det = a * d - b * c
+    return ((d * det, -b * det), (-c * det, a * det))
+
+
+def _symmetries():
+    turns = [((1, 0), (0, 1))]
+    for _ in range(5):
+        turns.append(_compose(_TURN, turns[-1]))
+    return tuple(turns + [_compose(turn, _MIRROR) for turn in turns])
+
+
+SYMMETRIES = _symmetries()
+
+
+def hex_round(q, r):
+    """Nearest hex to the fractional axial coordinates (q, r)"""
+    s = -q - r
+    rq, rr, rs = round(q), round(r), round(s)
+    dq, dr, ds = abs(rq - q), abs(rr - r), abs(rs - s)
+    # the coordinate that was rounded the most is rebuilt from the other two
+    if dq > dr and dq > ds:
+        rq = -rr - rs
+    elif dr > ds:
+        rr = -rq - rs
+    return rq, rr
@@ -0,0 +1,78 @@
+from collections import deque
+from engine.hexgrid import are_neighbors
+
+
+def move_is_not_blocked_or_jump(board, old, new):  # check for each pathfinding move
+    if not are_neighbors(old, new):
+        return True
+
+    # two neighbouring hexes share two neighbours, exactly one of them must
+    # be occupied: none is a jump away from the hive, both is a closed gate
+    old_adjacents_with_pieces = {x for x in board.neighbors(old) if board.has_pieces(x)}
+    overlap = [x for x in board.neighbors(new) if x in old_adjacents_with_pieces]
+    return len(overlap) == 1
+
+
+def path_exists(board, old, new, spider=False):
+    """
+    Check whether the piece on old can slide to new
+
+    Ants may take any number of steps, spiders exactly three without
+    visiting a hex twice. Both are answered from one walk over the hive
+    rather than by enumerating every path.
+    """
+    if spider:
+        return new in spider_reachable(board, old)
+    return new == old or new in ant_reachable(board, old)
+
+
+def can_slide(board, old, new):
+    """A one-hex slide keeps contact with the hive without squeezing through a gate"""
+    return move_is_not_blocked_or_jump(board, old, new)
+
+
+def ant_reachable(board, old):
+    """Every hex an ant on old can slide to, found with a single flood fill"""
+    piece = board.remove_piece(old)
+    visited = {old}
+    queue = deque([old])
+    while queue:
+        current = queue.popleft()
+        for neighbor in board.neighbors(current):
+            if (
+                neighbor not in visited
+                and not board.has_pieces(neighbor)
+                and board.is_hive_adjacent(neighbor)
+                and can_slide(board, current, neighbor)
+            ):
+                visited.add(neighbor)
+                queue.append(neighbor)
+    board.add_piece(old, piece)
+    visited.discard(old)
+    return visited
+
+
+def spider_reachable(board, old, steps=3):
+    """Hexes at the end of a slide of exactly steps hexes that never doubles back"""
+    piece = board.remove_piece(old)
+    reached = set()
+    path = [old]
+
+    def walk(current):
+        if len(path) - 1 == steps:
+            reached.add(current)
+            return
+        for neighbor in board.neighbors(current):
+            if (
+                neighbor not in path
+                and not board.has_pieces(neighbor)
+                and board.is_hive_adjacent(neighbor)
+                and can_slide(board, current, neighbor)
+            ):
+                path.append(neighbor)
+                walk(neighbor)
+                path.pop()
+
+    walk(old)
+    board.add_piece(old, piece)
+    return reached
@@ -0,0 +1,173 @@
+from engine.board import axial_distance, is_straight_line
+from engine.hexgrid import are_neighbors
+from engine.movement import (
+    move_is_not_blocked_or_jump,
+    path_exists,
+    ant_reachable,
+    spider_reachable,
+)
+from settings import PIECE_WHITE
+
+
+class Piece:
+    name = None
+
+    def __init__(self, color=PIECE_WHITE):
+        self.color = color
+
+    def move_is_valid(self, board, old, new):
+        return False
+
+    def destinations(self, board, old):
+        """Yield every hex the piece on old can move to by its own movement rule"""
+        return iter(())
+
+
+class Queen(Piece):
+    name = "Queen"
+
+    def move_is_valid(self, board, old, new):
+        if are_neighbors(old, new) and move_is_not_blocked_or_jump(board, old, new):
+            return True
+        else:
+            return False
+
+    def destinations(self, board, old):
+        for new in board.neighbors(old):
+            if not board.has_pieces(new) and move_is_not_blocked_or_jump(
+                board, old, new
+            ):
+                yield new
+
+
+class Ant(Piece):
+    name = "Ant"
+
+    def move_is_valid(self, board, old, new):
+        if path_exists(board, old, new):
+            return True
+        else:
+            return False
+
+    def destinations(self, board, old):
+        yield from ant_reachable(board, old)
+
+
+class Spider(Piece):
+    name = "Spider"
+
+    def move_is_valid(self, board, old, new):
+        if path_exists(board, old, new, spider=True) and move_is_not_blocked_or_jump(
+            board, old, new
+        ):
+            return True
+        else:
+            return False
+
+    def destinations(self, board, old):
+        for new in spider_reachable(board, old):
+            if move_is_not_blocked_or_jump(board, old, new):
+                yield new
+
+
+class Beetle(Piece):
+    name = "Beetle"
+
+    def move_is_valid(self, board, old, new):
+        if are_neighbors(old, new) and (
+            move_is_not_blocked_or_jump(board, old, new)
+            or board.has_pieces(new)
+            or len(board.stack(old)) > 1
+        ):
+
+            # can't slide into a blocked hex but it can go up or down into one
+
+            return True
+        else:
+            return False
+
+    def destinations(self, board, old):
+        climbing = len(board.stack(old)) > 1
+        for new in board.neighbors(old):
+            if (
+                climbing
+                or board.has_pieces(new)
+                or move_is_not_blocked_or_jump(board, old, new)
+            ):
+                yield new
+
+
+class Grasshopper(Piece):
+    name = "Grasshopper"
+
+    def move_is_valid(self, board, old, new):
+
+        # dist > 1, straight line, must hop over pieces
+
+        dist = axial_distance(old, new)
+
+        if dist > 1:
+            visited = [old]
+            queue = [old]
+            while queue and new not in visited:
+                current = queue.pop(0)
+                for neighbor in [
+                    x
+                    for x in board.neighbors(current)
+                    if board.has_pieces(x) and is_straight_line(old, x)
+                ]:
+                    if neighbor not in visited:
+                        visited.append(neighbor)
+                        queue.append(neighbor)
+
+            # have to check last hex seperately bc it will never have a piece
+
+            for penultimate in [x for x in board.neighbors(new) if board.has_pieces(x)]:
+                if penultimate in visited and is_straight_line(old, new):
+                    return True
+        return False
+
+    def destinations(self, board, old):
+        # walk the straight lines of pieces once and land just past them
+        visited = {old}
+        queue = [old]
+        while queue:
+            current = queue.pop(0)
+            for neighbor in board.neighbors(current):
+                if (
+                    neighbor not in visited
+                    and board.has_pieces(neighbor)
+                    and is_straight_line(old, neighbor)
+                ):
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+
+        landed = set()
+        for penultimate in visited:
+            for new in board.neighbors(penultimate):
+                if (
+                    new not in landed
+                    and not board.has_pieces(new)
+                    and is_straight_line(old, new)
+                    and axial_distance(old, new) > 1
+                ):
+                    landed.add(new)
+                    yield new
+
+
+# pieces each player starts with, in inventory order
+STARTING_PIECES = (
+    (Queen, 1),
+    (Beetle, 2),
+    (Spider, 2),
+    (Grasshopper, 3),
+    (Ant, 3),
+)
+
+
+def starting_hand(color):
+    return [
+        piece_type(color)
+        for (piece_type, count) in STARTING_PIECES
+        for _ in range(count)
+    ]
@@ -0,0 +1,114 @@
+"""
+Immutable position snapshots
+
+A Position holds what the rules need: the stacks, both hands, the turn, the
+start hex and the cells of a bounded board. Pieces are stored as small
+integer codes instead of objects, so a Position is built in microseconds,
+compares and hashes by value and pickles to a few hundred bytes for a process
+pool. to_game turns it back into a headless Game and Game_State.load_position
+puts it on the UI board.
+"""
+
+from array import array
+from collections import namedtuple
+from engine.board import Board
+from engine.game import Game
+from engine.pieces import STARTING_PIECES
+from settings import PIECE_WHITE, PIECE_BLACK
+
+COLORS = (PIECE_WHITE, PIECE_BLACK)
+PIECE_TYPES = tuple(piece_type for piece_type, _ in STARTING_PIECES)
+_TYPE_INDEX = {piece_type.name: index for index, piece_type in enumerate(PIECE_TYPES)}
+
+# cells of bounded boards packed as int16 (r, first q, count) runs of each
+# row, by neighbour table (shared by every board on the same grid and never
+# freed), and unpacked again by packed cells
+_packed_cells = {}
+_unpacked_cells = {}
+
+
+def piece_code(piece):
+    """Small integer for the colour and kind of a piece"""
+    return COLORS.index(piece.color) * len(PIECE_TYPES) + _TYPE_INDEX[piece.name]
+
+
+def piece_kind(code):
+    """(color, piece type) of a piece code"""
+    color, index = divmod(code, len(PIECE_TYPES))
+    return COLORS[color], PIECE_TYPES[index]
+
+
+def _pack_cells(board):
+    if not board.bounded:
+        return None
+    packed = _packed_cells.get(id(board.neighbor_table))
+    if packed is None:
+        runs = array("h")
+        for q, r in sorted(board.stacks, key=lambda coords: (coords[1], coords[0])):
+            if runs and runs[-3] == r and runs[-2] + runs[-1] == q:
+                runs[-1] += 1
+            else:
+                runs.extend((r, q, 1))
+        packed = _packed_cells[id(board.neighbor_table)] = runs.tobytes()
+    return packed
+
+
+def _unpack_cells(packed):
+    cells = _unpacked_cells.get(packed)
+    if cells is None:
+        runs = array("h")
+        runs.frombytes(packed)
+        cells = _unpacked_cells[packed] = tuple(
+            (q, r)
+            for r, first, count in zip(runs[::3], runs[1::3], runs[2::3])
+            for q in range(first, first + count)
+        )
+    return cells
+
+
+class Position(namedtuple("Position", ["stacks", "hands", "turn", "start", "cells"])):
+    """
+    stacks: ((coords, piece codes from the bottom up), ...) sorted by coords
+    hands: (white's piece codes, black's piece codes), sorted
+    cells: the packed cells of a bounded board, None for an unbounded one
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_game(cls, game):
+        board = game.board
+        stacks = tuple(
+            sorted(
+                (coords, bytes(piece_code(piece) for piece in board.stacks[coords]))
+                for coords in board.occupied_cells
+            )
+        )
+        # unmake puts a piece back at the end of the hand, so the codes are
+        # sorted for the same position to give the same hands
+        hands = tuple(
+            bytes(sorted(piece_code(piece) for piece in game.hand(color)))
+            for color in COLORS
+        )
+        return cls(stacks, hands, game.turn, board.start, _pack_cells(board))
+
+    def occupied(self):
+        return [coords for coords, _ in self.stacks]
+
+    def to_game(self):
+        """Headless Game of the position, with pieces of its own"""
+        cells = None
+        if self.cells is not None:
+            cells = {coords: [] for coords in _unpack_cells(self.cells)}
+        board = Board(cells, start=self.start)
+        for coords, codes in self.stacks:
+            for code in codes:
+                color, piece_type = piece_kind(code)
+                board.add_piece(coords, piece_type(color))
+        hands = {}
+        for color, codes in zip(COLORS, self.hands):
+            hands[color] = []
+            for code in codes:
+                _, piece_type = piece_kind(code)
+                hands[color].append(piece_type(color))
+        return Game(board=board, hands=hands, turn=self.turn)
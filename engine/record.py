@@ -0,0 +1,308 @@
+"""
+Game records in Hive notation
+
+A move names the piece, e.g. wA2 for white's second ant, followed by where
+it went next to a piece that is already on the board:
+
+    wS1 bG1-    east of bG1         wS1 -bG1    west of bG1
+    wS1 bG1/    north-east of bG1   wS1 /bG1    south-west of bG1
+    wS1 bG1\\    south-east of bG1   wS1 \\bG1    north-west of bG1
+    wB1 bQ      on top of bQ
+
+Directions are as the board is drawn on screen. The first move of the game
+has no reference piece and a player without a legal move passes. A game is
+its moves joined by ";", so a game fits on one line of text.
+
+Every move also packs into two bytes (the piece, the reference piece and the
+direction), so self-play games can be stored by the million and replayed
+headlessly through the rules engine.
+"""
+
+import struct
+from itertools import islice
+from engine.game import Game, Move
+from engine.hexgrid import DIRECTIONS
+from engine.pieces import STARTING_PIECES
+from engine.rules import is_valid_move, player_has_no_moves
+from settings import PIECE_WHITE, PIECE_BLACK
+
+PASS = "pass"
+SEPARATOR = ";"
+
+COLOR_LETTERS = {PIECE_WHITE: "w", PIECE_BLACK: "b"}
+COLORS = {letter: color for color, letter in COLOR_LETTERS.items()}
+PIECE_LETTERS = {
+    "Queen": "Q",
+    "Ant": "A",
+    "Spider": "S",
+    "Beetle": "B",
+    "Grasshopper": "G",
+}
+PIECE_NAMES = {letter: name for name, letter in PIECE_LETTERS.items()}
+
+# where the moved piece is relative to the reference piece, as (dq, dr),
+# for symbols after the reference (east side) and before it (west side)
+SUFFIX_OFFSETS = {"-": (1, 0), "/": (1, -1), "\\": (0, 1)}
+PREFIX_OFFSETS = {"-": (-1, 0), "/": (-1, 1), "\\": (0, -1)}
+OFFSET_FORMATS = {offset: "{}" + symbol for symbol, offset in SUFFIX_OFFSETS.items()}
+OFFSET_FORMATS.update(
+    {offset: symbol + "{}" for symbol, offset in PREFIX_OFFSETS.items()}
+)
+
+# every piece label of a game, the index is its number in the packed form
+LABELS = [
+    COLOR_LETTERS[color]
+    + PIECE_LETTERS[piece_type.name]
+    + (str(number) if count > 1 else "")
+    for color in (PIECE_WHITE, PIECE_BLACK)
+    for piece_type, count in STARTING_PIECES
+    for number in range(1, count + 1)
+]
+LABEL_INDEX = {label: index for index, label in enumerate(LABELS)}
+
+# packed move: piece index << 8 | reference index << 3 | direction
+ON_TOP = len(OFFSET_FORMATS)  # direction of a climb onto the reference
+NO_REFERENCE = ON_TOP + 1  # direction of the first move
+PACKED_OFFSETS = list(OFFSET_FORMATS)
+PACKED_PASS = 0xFFFF
+
+
+def parse(text):
+    """
+    (piece label, reference label, offset) of a move in notation
+
+    The reference is None for the first move and the offset is None for a
+    move on top of the reference. A pass parses to None.
+    """
+    text = text.strip()
+    if text == PASS:
+        return None
+    label, _, reference = text.partition(" ")
+    if not reference:
+        return label, None, None
+    if reference[-1] in SUFFIX_OFFSETS:
+        return label, reference[:-1], SUFFIX_OFFSETS[reference[-1]]
+    if reference[0] in PREFIX_OFFSETS:
+        return label, reference[1:], PREFIX_OFFSETS[reference[0]]
+    return label, reference, None
+
+
+def format_move(label, reference, offset):
+    """Notation of a move, the inverse of parse"""
+    if reference is None:
+        return label
+    if offset is None:
+        return f"{label} {reference}"
+    return f"{label} {OFFSET_FORMATS[offset].format(reference)}"
+
+
+def split_moves(text):
+    """Moves of a game written as one line, or one move per line"""
+    return [
+        move.strip()
+        for line in text.splitlines()
+        for move in line.split(SEPARATOR)
+        if move.strip()
+    ]
+
+
+def pack(moves):
+    """Two bytes per move of the notation in moves"""
+    codes = []
+    for text in moves:
+        parsed = parse(text)
+        if parsed is None:
+            codes.append(PACKED_PASS)
+            continue
+        label, reference, offset = parsed
+        if reference is None:
+            direction = NO_REFERENCE
+        elif offset is None:
+            direction = ON_TOP
+        else:
+            direction = PACKED_OFFSETS.index(offset)
+        reference_index = LABEL_INDEX[reference] if reference else 0
+        codes.append(LABEL_INDEX[label] << 8 | reference_index << 3 | direction)
+    return struct.pack(f"<{len(codes)}H", *codes)
+
+
+def unpack(data):
+    """Moves in notation of bytes made by pack"""
+    moves = []
+    for (code,) in struct.iter_unpack("<H", data):
+        if code == PACKED_PASS:
+            moves.append(PASS)
+            continue
+        label = LABELS[code >> 8]
+        direction = code & 7
+        if direction == NO_REFERENCE:
+            moves.append(format_move(label, None, None))
+        elif direction == ON_TOP:
+            moves.append(format_move(label, LABELS[code >> 3 & 31], None))
+        else:
+            moves.append(
+                format_move(label, LABELS[code >> 3 & 31], PACKED_OFFSETS[direction])
+            )
+    return moves
+
+
+def write_games(stream, games):
+    """Write the moves of every game to a binary stream, two bytes a move"""
+    for moves in games:
+        data = pack(moves)
+        stream.write(struct.pack("<H", len(data) // 2))
+        stream.write(data)
+
+
+def read_games(stream):
+    """Yield the moves of every game written by write_games"""
+    while True:
+        header = stream.read(2)
+        if len(header) < 2:
+            return
+        (count,) = struct.unpack("<H", header)
+        yield unpack(stream.read(2 * count))
+
+
+class GameRecord:
+    """
+    Moves of one game in notation, written as they are played
+
+    Pieces get their number (wA1, wA2, ...) in the order they are placed,
+    so every move of the game must go through add (before it is made) or
+    play.
+    """
+
+    def __init__(self):
+        self.moves = []
+        self.labels = {}  # piece -> label
+        self.pieces = {}  # label -> piece
+        self.coords = {}  # label -> where the piece is
+        self.placed = {}  # (color, piece name) -> pieces placed so far
+
+    def text(self):
+        return SEPARATOR.join(self.moves)
+
+    def pack(self):
+        return pack(self.moves)
+
+    def label_board(self, board):
+        """
+        Number the pieces already on board, for a record that starts from a
+        loaded position: by hex and from the bottom of each stack up
+        """
+        for coords in sorted(board.occupied()):
+            for piece in board.stack(coords):
+                self._track(Move(piece, None, coords), self._label(piece))
+
+    def add(self, game, move):
+        """Record move, which is about to be made on game, and return it"""
+        text = self.notation(game.board, move)
+        self.moves.append(text)
+        if move is not None:
+            self._track(move, self._label(move.piece))
+        return text
+
+    def notation(self, board, move):
+        """Notation of move on board, before it is made"""
+        if move is None:
+            return PASS
+        reference, offset = self._reference(board, move)
+        if reference is None:
+            return format_move(self._label(move.piece), None, None)
+        return format_move(self._label(move.piece), self.labels[reference], offset)
+
+    def play(self, game, text, validate=True):
+        """
+        Make the move written as text on game, record it and return it
+
+        With validate the move is checked against the rules first and an
+        illegal one raises ValueError.
+        """
+        parsed = parse(text)
+        move = None if parsed is None else self._move(game, text, *parsed)
+        if validate:
+            if move is None:
+                legal = player_has_no_moves(game)
+            else:
+                legal = move.piece.color == game.get_current_player_color() and (
+                    is_valid_move(game, move.piece, move.src, move.dst)
+                )
+            if not legal:
+                raise ValueError(f"illegal move {text} on turn {game.turn}")
+
+        self.moves.append(text)
+        if move is not None:
+            self._track(move, parsed[0])
+        game.make(move)
+        return move
+
+    def _move(self, game, text, label, reference, offset):
+        piece = self.pieces.get(label)
+        if piece is not None:
+            src = self.coords[label]
+        else:
+            color = COLORS[label[0]]
+            name = PIECE_NAMES[label[1]]
+            piece = next(
+                (piece for piece in game.hand(color) if piece.name == name), None
+            )
+            if piece is None:
+                raise ValueError(f"{text}: no {label} left to place")
+            src = None
+
+        if reference is None:
+            dst = game.board.start
+        else:
+            if reference not in self.coords:
+                raise ValueError(f"{text}: {reference} is not on the board")
+            (q, r) = self.coords[reference]
+            (dq, dr) = offset if offset is not None else (0, 0)
+            dst = (q + dq, r + dr)
+        return Move(piece, src, dst)
+
+    def _label(self, piece):
+        label = self.labels.get(piece)
+        if label is None:
+            key = (piece.color, piece.name)
+            number = self.placed.get(key, 0) + 1
+            label = COLOR_LETTERS[piece.color] + PIECE_LETTERS[piece.name]
+            if piece.name != "Queen":
+                label += str(number)
+        return label
+
+    def _track(self, move, label):
+        if move.src is None:
+            key = (move.piece.color, move.piece.name)
+            self.placed[key] = self.placed.get(key, 0) + 1
+            self.labels[move.piece] = label
+            self.pieces[label] = move.piece
+        self.coords[label] = move.dst
+
+    def _reference(self, board, move):
+        """(piece, offset of dst from it) to write the move relative to"""
+        top = board.top(move.dst)
+        if top is not None:
+            return top, None
+        (q, r) = move.dst
+        for dq, dr in DIRECTIONS:
+            stack = board.stack((q + dq, r + dr))
+            if (q + dq, r + dr) == move.src:
+                stack = stack[:-1]  # the moving piece itself doesn't count
+            if stack:
+                return stack[-1], (-dq, -dr)
+        return None, None
+
+
+def replay(moves, plies=None, validate=True):
+    """
+    Game reached by playing the moves (in notation) from the start
+
+    Only the first plies moves are played when plies is given. Without
+    validate trusted records replay much faster.
+    """
+    game = Game()
+    record = GameRecord()
+    for text in islice(moves, plies):
+        record.play(game, text, validate)
+    return game
@@ -0,0 +1,241 @@
+from engine.game import Move
+from engine.pieces import Queen, Beetle
+from settings import PIECE_WHITE, PIECE_BLACK
+
+
+def is_valid_move(game, piece, old, new):
+    """
+    Check whether piece may go from old to new
+
+    :param old: Axial coords of the piece, or None when placing from the hand
+    :param new: Axial coords of the destination
+    """
+    board = game.board
+    base_move_check = (
+        new is not None
+        and new != old
+        and board.on_board(new)
+        # beetles can climb onto the hive but can't be placed on top of it
+        and (
+            not board.has_pieces(new) or (old is not None and isinstance(piece, Beetle))
+        )
+    )
+    if not base_move_check:
+        return False
+
+    if game.turn == 1:
+        return new == board.start
+    elif game.turn == 2:
+        return board.is_hive_adjacent(new)
+
+    full_move_check = (
+        board.is_hive_adjacent(new)
+        and (old is None or move_does_not_break_hive(board, old))
+        and (
+            placement_is_allowed(board, piece, old, new)
+            or (old is not None and piece.move_is_valid(board, old, new))
+        )
+    )
+    return full_move_check and turn_allows_move(game, piece, old)
+
+
+def turn_allows_move(game, piece, old):
+    """Queen rules of the opening turns, they only depend on the piece"""
+    if game.turn <= 6:
+        return queen_is_on_board(game, old)
+    elif game.turn == 7 or game.turn == 8:
+        return move_obeys_queen_by_4(game, piece)
+    return True
+
+
+def move_does_not_break_hive(board, old):
+    return old not in board.pinned()
+
+
+def queen_is_on_board(game, old):
+    if old is None:  # placements are ok
+        return True
+
+    # allow move if queen is down for that color
+
+    color = game.get_current_player_color()
+    for _, piece in game.board.pieces():
+        if isinstance(piece, Queen) and piece.color == color:
+            return True
+    return False
+
+
+def move_obeys_queen_by_4(game, moving_piece):
+    queens_on_board = [
+        piece for _, piece in game.board.pieces() if isinstance(piece, Queen)
+    ]
+    moving_queen = isinstance(moving_piece, Queen)
+
+    if len(queens_on_board) == 2:
+        return True
+    elif len(queens_on_board) == 0:
+        if game.turn == 7 and moving_queen and moving_piece.color == PIECE_WHITE:
+            return True
+        elif game.turn == 8 and moving_queen and moving_piece.color == PIECE_BLACK:
+            return True
+    else:
+        if queens_on_board[0].color == PIECE_WHITE and game.turn == 7:
+            return True
+        elif (
+            queens_on_board[0].color == PIECE_BLACK and game.turn == 7 and moving_queen
+        ):
+            return True
+        elif queens_on_board[0].color == PIECE_BLACK and game.turn == 8:
+            return True
+        elif (
+            queens_on_board[0].color == PIECE_WHITE and game.turn == 8 and moving_queen
+        ):
+            return True
+
+    return False
+
+
+def placement_is_allowed(board, piece, old, new):
+    if old is None:
+        for neighbor in [x for x in board.neighbors(new) if board.has_pieces(x)]:
+
+            # placed pieces cannot touch other player's pieces to start
+
+            if board.top(neighbor).color != piece.color:
+                return False
+        return True
+    return False
+
+
+def queen_is_surrounded(board, coords):
+    neighbors = board.neighbors(coords)
+    return len([x for x in neighbors if board.has_pieces(x)]) == 6
+
+
+def game_is_over(game):
+    """Check whether a queen is surrounded and record the winner on the game"""
+    white_queen = None
+    black_queen = None
+
+    # First find both queens
+    for coords, piece in game.board.pieces():
+        if isinstance(piece, Queen):
+            if piece.color == PIECE_WHITE:
+                white_queen = coords
+            else:
+                black_queen = coords
+
+    # Check if both queens are present
+    if not white_queen or not black_queen:
+        return False
+
+    white_surrounded = queen_is_surrounded(game.board, white_queen)
+    black_surrounded = queen_is_surrounded(game.board, black_queen)
+
+    # Determine winner
+    if white_surrounded and black_surrounded:
+        # It's a draw if both queens are surrounded
+        game.winner = None
+        return True
+    elif white_surrounded:
+        game.winner = PIECE_BLACK
+        return True
+    elif black_surrounded:
+        game.winner = PIECE_WHITE
+        return True
+
+    return False
+
+
+def candidate_destinations(game):
+    """Empty hexes touching the hive (or the start hex on an empty board)"""
+    board = game.board
+    occupied = board.occupied()
+    if not occupied:
+        return [board.start] if board.on_board(board.start) else []
+
+    destinations = set()
+    for coords in occupied:
+        for neighbor in board.neighbors(coords):
+            if not board.has_pieces(neighbor):
+                destinations.add(neighbor)
+    return list(destinations)
+
+
+def movable_pieces(game, color):
+    """(piece, coords) for the player's placeable and movable pieces"""
+    placeable = []
+    seen = set()
+    for piece in game.hand(color):
+        if piece.name not in seen:
+            seen.add(piece.name)
+            placeable.append((piece, None))
+
+    on_board = [
+        (game.board.top(coords), coords)
+        for coords in game.board.occupied()
+        if game.board.top(coords).color == color
+    ]
+    return placeable + on_board
+
+
+def placement_destinations(game, color):
+    """Hexes a piece of color may be placed on this turn"""
+    board = game.board
+    if game.turn == 1:
+        start = board.start
+        return [start] if board.on_board(start) and not board.has_pieces(start) else []
+    elif game.turn == 2:
+        return candidate_destinations(game)
+
+    return [
+        new
+        for new in candidate_destinations(game)
+        if all(
+            board.top(neighbor).color == color
+            for neighbor in board.neighbors(new)
+            if board.has_pieces(neighbor)
+        )
+    ]
+
+
+def iter_valid_moves(game, color=None):
+    """
+    Yield every legal move for color (the player to move by default)
+
+    Placements share one list of hexes and every piece on the board walks
+    its own destinations once, instead of testing each hex with is_valid_move.
+    """
+    if color is None:
+        color = game.get_current_player_color()
+
+    board = game.board
+    placeable, on_board = [], []
+    for piece, old in movable_pieces(game, color):
+        (placeable if old is None else on_board).append((piece, old))
+
+    if placeable:
+        targets = placement_destinations(game, color)
+        for piece, _ in placeable:
+            if targets and turn_allows_move(game, piece, None):
+                for new in targets:
+                    yield Move(piece, None, new)
+
+    # nothing of the player's is on the board before the third turn
+    if game.turn <= 2:
+        return
+    pinned = board.pinned()
+    for piece, old in on_board:
+        if old in pinned or not turn_allows_move(game, piece, old):
+            continue
+        for new in piece.destinations(board, old):
+            yield Move(piece, old, new)
+
+
+def valid_moves(game, color=None):
+    """Every legal move for color (the player to move by default)"""
+    return list(iter_valid_moves(game, color))
+
+
+def player_has_no_moves(game):
+    return next(iter_valid_moves(game), None) is None
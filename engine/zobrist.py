@@ -0,0 +1,46 @@
+"""
+Zobrist keys for hashing positions
+
+Keys are derived from a digest of what they describe instead of a seeded
+random table, so they are the same in every process and the (unbounded)
+board never runs out of them.
+"""
+
+import hashlib
+
+_keys = {}
+
+
+def _digest_key(*fields):
+    digest = hashlib.blake2b(repr(fields).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def piece_key(piece, height, coords):
+    """Key for piece sitting at the given (1-based) stack height on coords"""
+    entry = (piece.name, piece.color, height, coords)
+    key = _keys.get(entry)
+    if key is None:
+        key = _keys[entry] = _digest_key("piece", *entry)
+    return key
+
+
+# toggled when it is the second player's move
+SIDE_KEY = _digest_key("side")
+
+# the rules and the early game evaluation depend on the turn until both
+# queens have to be down, later turns all share one key
+TURN_KEYS = [_digest_key("turn", turn) for turn in range(10)]
+
+
+def turn_key(turn):
+    return TURN_KEYS[min(turn, 9)]
+
+
+def board_hash(board):
+    """Full hash of a board, the incremental Board.hash must always match it"""
+    key = 0
+    for coords in board.occupied():
+        for height, piece in enumerate(board.stack(coords), start=1):
+            key ^= piece_key(piece, height, coords)
+    return key
@@ -8,13 +8,17 @@ from settings import (
     START_COLOR,
     WIDTH,
     HEIGHT,
+    AI_ENGINE,
 )
 from ai_player import AIPlayer
+from mcts_player import MCTSPlayer
 
 HUMAN_VS_HUMAN = "Human vs Human"
 HUMAN_VS_AI = "Human vs AI"
 AI_VS_AI = "AI vs AI"
 
+AI_PLAYERS = {"minimax": AIPlayer, "mcts": MCTSPlayer}
+
 
 class GameModeButton:
     def __init__(self, text, rect):
@@ -27,15 +31,15 @@ class GameModeButton:
         if self.rect.collidepoint(pos):
             state.game_mode = self.mode
             if self.mode == HUMAN_VS_AI:
-                state.ai_player_black = AIPlayer(
+                state.ai_player_black = AI_PLAYERS[AI_ENGINE](
                     PIECE_BLACK
                 )  # Initialize with default difficulty
                 state.difficulty_selection_needed = ["black"]
             elif self.mode == AI_VS_AI:
-                state.ai_player_white = AIPlayer(
+                state.ai_player_white = AI_PLAYERS[AI_ENGINE](
                     PIECE_WHITE
                 )  # Initialize with default difficulty
-                state.ai_player_black = AIPlayer(
+                state.ai_player_black = AI_PLAYERS[AI_ENGINE](
                     PIECE_BLACK
                 )  # Initialize with default difficulty
                 state.difficulty_selection_needed = ["white", "black"]
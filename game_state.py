@@ -1,12 +1,28 @@
-from tile import Inventory_Tile
+from tile import Inventory_Tile, Start_Tile, Tile_Locator
 from pieces import Queen, Grasshopper, Spider, Beetle, Ant
 from inventory_frame import Inventory_Frame
 from turn_panel import Turn_Panel
-from settings import PIECE_WHITE, PIECE_BLACK
+from engine import Board, Game, Move, START
+from engine.record import GameRecord
+from engine.position import Position, piece_kind
+from settings import PIECE_WHITE, PIECE_BLACK, RECORD_FILE
 
 
-class Game_State:
+class Game_State(Game):
     def __init__(self, tiles=[], white_inventory=None, black_inventory=None):
+        # the rules engine reads the board straight from the tiles' piece lists
+        start_tile = next((tile for tile in tiles if type(tile) is Start_Tile), None)
+        super().__init__(
+            board=Board(
+                {tile.axial_coords: tile.pieces for tile in tiles},
+                start=start_tile.axial_coords if start_tile else START,
+            ),
+            hands={},
+        )
+        self.tiles_by_coords = {tile.axial_coords: tile for tile in tiles}
+        for tile in tiles:
+            tile.board = self.board
+
         # Existing initialization code...
         self.running = True
         self.menu_loop = True
@@ -23,6 +39,12 @@ class Game_State:
             if white_inventory and black_inventory
             else []
         )
+        self.locator = Tile_Locator(self.board_tiles)
+        self.home_tiles = {
+            tile.pieces[-1]: tile
+            for tile in self.board_tiles
+            if type(tile) is Inventory_Tile and tile.has_pieces()
+        }
 
         self.turn_panel = Turn_Panel()
 
@@ -41,6 +63,7 @@ class Game_State:
 
         # other
         self.winner = None
+        self.record = GameRecord()  # notation of the moves played so far
 
     def start_game(self):
         self.menu_loop = False
@@ -49,6 +72,9 @@ class Game_State:
     def end_game(self):
         self.main_loop = False
         self.end_loop = True
+        if RECORD_FILE:
+            with open(RECORD_FILE, "a") as record_file:
+                record_file.write(self.record.text() + "\n")
 
     def new_game(self):
         # Reset all game state attributes
@@ -58,6 +84,7 @@ class Game_State:
         self.clicked = False
         self.moving_piece = None
         self.winner = None
+        self.record = GameRecord()
         self.game_mode = None
         self.ai_player_white = None
         self.ai_player_black = None
@@ -80,7 +107,7 @@ class Game_State:
     def close_popup(self):
         self.main_loop = True
         self.move_popup_loop = False
-        self.next_turn()
+        self.skip_turn()
 
     def add_moving_piece(self, piece):
         self.moving_piece = piece
@@ -96,10 +123,21 @@ class Game_State:
 
     def add_tiles(self, tiles):
         self.board_tiles.extend(tiles)
+        self.locator = Tile_Locator(self.board_tiles)
 
     def next_turn(self):
         self.turn += 1
 
+    def skip_turn(self):
+        """The player to move passes"""
+        self.record.add(self, None)
+        self.next_turn()
+
+    def record_move(self, old_tile, new_tile):
+        """Add the move of old_tile's top piece to new_tile to the record"""
+        src = None if type(old_tile) is Inventory_Tile else old_tile.axial_coords
+        self.record.add(self, Move(old_tile.pieces[-1], src, new_tile.axial_coords))
+
     def is_player_turn(self):
         if self.moving_piece.color == PIECE_WHITE and self.turn % 2 == 1:
             return True
@@ -109,27 +147,79 @@ class Game_State:
             return False
 
     def get_tiles_with_pieces(self, include_inventory=False):
-        tiles = []
-        for tile in self.board_tiles:
-            if include_inventory:
-                if tile.has_pieces():
-                    tiles.append(tile)
-            elif tile.has_pieces() and type(tile) is not Inventory_Tile:
-                tiles.append(tile)
+        tiles = [self.tiles_by_coords[coords] for coords in self.board.occupied()]
+        if include_inventory:
+            for inventory in (self.white_inventory, self.black_inventory):
+                if inventory:
+                    tiles.extend(tile for tile in inventory.tiles if tile.has_pieces())
         return tiles
 
-    def get_current_player_color(self):
+    def get_tile(self, coords):
+        return self.tiles_by_coords.get(coords)
+
+    def tile_at(self, pos):
+        """Tile under the screen position pos, None if there is none"""
+        return self.locator.tile_at(pos)
+
+    def get_move_tiles(self, move):
+        """(old_tile, new_tile) for an engine move"""
+        if move.src is None:
+            old_tile = self.home_tiles[move.piece]
+        else:
+            old_tile = self.tiles_by_coords[move.src]
+        return old_tile, self.tiles_by_coords[move.dst]
+
+    def position(self):
+        """Immutable Position of the game, e.g. to hand to a worker process"""
+        return Position.from_game(self)
+
+    def load_position(self, position):
         """
-        Determine the current player's color based on the turn
+        Put a Position on the board: the pieces, the inventories and the turn
+
+        The game record starts over from the loaded position, with its pieces
+        numbered by label_board.
         """
-        return PIECE_WHITE if self.turn % 2 == 1 else PIECE_BLACK
+        for coords in self.board.occupied():
+            tile = self.tiles_by_coords[coords]
+            while tile.has_pieces():
+                self.add_to_hand(tile.remove_piece())
+
+        for coords, codes in position.stacks:
+            for code in codes:
+                color, piece_type = piece_kind(code)
+                piece = next(
+                    piece for piece in self.hand(color) if piece.name == piece_type.name
+                )
+                self.remove_from_hand(piece)
+                self.tiles_by_coords[coords].add_piece(piece)
+        self.turn = position.turn
+        self.winner = None
+        self.record = GameRecord()
+        self.record.label_board(self.board)
+
+    def get_inventory(self, color):
+        return self.white_inventory if color == PIECE_WHITE else self.black_inventory
+
+    def hand(self, color):
+        """Pieces left on the player's inventory tiles"""
+        inventory = self.get_inventory(color)
+        if inventory is None:
+            return []
+        return [tile.pieces[-1] for tile in inventory.tiles if tile.has_pieces()]
+
+    def remove_from_hand(self, piece):
+        self.home_tiles[piece].remove_piece()
+
+    def add_to_hand(self, piece):
+        self.home_tiles[piece].add_piece(piece)
 
     def get_ai_player(self):
         """
         Get the current AI player based on the turn
         """
         if self.game_mode == "Human vs AI":
-            return self.ai_player_white if self.turn % 2 == 0 else None
+            return self.ai_player_black if self.turn % 2 == 0 else None
         elif self.game_mode == "AI vs AI":
             return self.ai_player_white if self.turn % 2 == 1 else self.ai_player_black
         return None
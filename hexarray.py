@@ -0,0 +1,28 @@
+"""
+Hex geometry over many cells at once
+
+The evaluator compares every blocking piece with every enemy piece. One pair
+at a time that is three distance calls per pair, counting them together
+computes each distance to the queen only once. A board has at most 4 x 11
+such pairs, too few for NumPy arrays to make up for their fixed cost per
+call (and for the time it takes to import NumPy in every worker process).
+"""
+
+from engine import hex_distance
+
+
+def count_between(pieces, enemies, queen):
+    """
+    Number of (piece, enemy) pairs with the piece between the enemy and queen
+
+    A piece is between when going from the enemy to the queen through it is
+    at most one step longer than the direct way, see AIPlayer._is_between.
+    """
+    enemy_to_queen = [(enemy, hex_distance(enemy, queen)) for enemy in enemies]
+    count = 0
+    for piece in pieces:
+        piece_to_queen = hex_distance(piece, queen)
+        for enemy, total in enemy_to_queen:
+            if abs(hex_distance(enemy, piece) + piece_to_queen - total) <= 1:
+                count += 1
+    return count
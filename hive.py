@@ -1,15 +1,25 @@
 import pygame as pg
 import traceback
 import time
-from tile import Tile, initialize_grid, draw_drag
+from tile import Tile, initialize_grid
+from pieces import load_sprites
 from move_checker import is_valid_move, game_is_over, player_has_no_moves
 from menus import difficulty_menu, start_menu, end_menu, no_move_popup
 from game_mode import game_mode_menu
 from game_state import Game_State
 from inventory_frame import Inventory_Frame
 from turn_panel import Turn_Panel
+from board_view import Board_View
 from ai_player import AIPlayer
-from settings import BACKGROUND, WIDTH, HEIGHT, PIECE_WHITE, PIECE_BLACK
+from ai_worker import AISearch
+from settings import (
+    WIDTH,
+    HEIGHT,
+    FPS,
+    DRAW_TIMING,
+    PIECE_WHITE,
+    PIECE_BLACK,
+)
 
 
 def Hive():
@@ -17,13 +27,15 @@ def Hive():
 
     # Create the screen
     screen = pg.display.set_mode((WIDTH, HEIGHT))
-    background = pg.Surface(screen.get_size())
 
     # Title and Icon
     pg.display.set_caption("Hive")
     icon = pg.image.load("images/icon.png")
     pg.display.set_icon(icon)
 
+    # piece images are converted to the screen format, so load them after it
+    load_sprites()
+
     # Create inventories first
     white_inventory = Inventory_Frame((0, 158), 0, white=True)
     black_inventory = Inventory_Frame((440, 158), 1, white=False)
@@ -36,10 +48,18 @@ def Hive():
         white_inventory=white_inventory,
         black_inventory=black_inventory,
     )
+    view = Board_View(
+        screen, state.board_tiles, [white_inventory, black_inventory], state.turn_panel
+    )
 
     # Track the last AI move time
     last_ai_move_time = 0
     AI_MOVE_DELAY = 1.0  # 1 second delay between AI moves
+    ai_search = None  # AI move being searched in the background
+    clock = pg.time.Clock()
+    draw_time = 0.0  # seconds spent drawing since the last timing report
+    drawn_frames = 0
+    updated_areas = 0
 
     while state.running:
         while state.menu_loop:
@@ -48,6 +68,7 @@ def Hive():
                     state.quit()
                     break
                 start_menu(screen, state, event)
+            clock.tick(FPS)
 
         # Game mode selection
         while not state.game_mode:
@@ -56,6 +77,7 @@ def Hive():
                     state.quit()
                     break
                 game_mode_menu(screen, state, event)
+            clock.tick(FPS)
 
         # Difficulty selection for AI players
         while state.difficulty_selection_needed:
@@ -67,97 +89,74 @@ def Hive():
                 if difficulty_menu(screen, state, event, current_ai):
                     state.difficulty_selection_needed.pop(0)
                     break
+            clock.tick(FPS)
 
         while state.move_popup_loop:
             for event in pg.event.get():
                 if event.type == pg.QUIT:
                     state.quit()
                     break
-                no_move_popup(screen, background, state, event)
+                no_move_popup(screen, view.surface, state, event)
+            clock.tick(FPS)
+
+        # menus and popups draw straight on the screen
+        view.invalidate()
 
         while state.main_loop:
             pos = pg.mouse.get_pos()
             current_time = time.time()
 
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    state.quit()
-                    break
-                if event.type == pg.KEYDOWN:
-                    if event.key == pg.K_ESCAPE:
-                        state.quit()
-                        break
-
-                # Enhanced AI Move Logic with Delay and Error Handling
-                try:
-                    if state.game_mode == "Human vs AI":
-                        if state.turn % 2 == 0:  # AI's turn (Black)
-                            # Check if enough time has passed since last AI move
-                            if current_time - last_ai_move_time >= AI_MOVE_DELAY:
-                                print(f"Preparing AI move. Turn: {state.turn}")
-                                old_tile, new_tile = (
-                                    state.ai_player_black.get_best_move(state)
-                                )
-
-                                if old_tile is None or new_tile is None:
-                                    print(
-                                        "Invalid move generated by AI. Skipping turn."
-                                    )
-                                    state.next_turn()
-                                    last_ai_move_time = current_time
-                                    continue
-
-                                if is_valid_move(state, old_tile, new_tile):
-                                    state.add_moving_piece(old_tile.pieces[-1])
-                                    old_tile.move_piece(new_tile)
-                                    print(
-                                        f"AI move successful. Next turn: {state.turn + 1}"
-                                    )
-                                    state.next_turn()
-                                    last_ai_move_time = current_time
-                                    if player_has_no_moves(state):
-                                        state.open_popup()
-
-                                state.remove_moving_piece()
-
-                    elif state.game_mode == "AI vs AI":
-                        # Check if enough time has passed since last AI move
-                        if current_time - last_ai_move_time >= AI_MOVE_DELAY:
-                            # Alternate between white and black AI players
-                            ai_to_move = (
-                                state.ai_player_white
-                                if state.turn % 2 == 1
-                                else state.ai_player_black
-                            )
-                            print(
-                                f"Preparing AI move for {ai_to_move.color}. Turn: {state.turn}"
-                            )
-                            old_tile, new_tile = ai_to_move.get_best_move(state)
-
-                            if old_tile is None or new_tile is None:
-                                print("Invalid move generated by AI. Skipping turn.")
-                                state.next_turn()
-                                last_ai_move_time = current_time
-                                continue
+            # AI moves are searched in the background and polled every frame,
+            # so AI vs AI games don't wait for events and the window stays live
+            ai_to_move = state.get_ai_player()
+            if ai_search is None:
+                if (
+                    ai_to_move is not None
+                    and current_time - last_ai_move_time >= AI_MOVE_DELAY
+                ):
+                    print(
+                        f"Preparing AI move for {ai_to_move.color}. Turn: {state.turn}"
+                    )
+                    ai_search = AISearch(ai_to_move, state)
+            elif ai_search.done():
+                search, ai_search = ai_search, None
+                if not search.is_stale(state):
+                    try:
+                        move = search.result()
+
+                        if move is None:
+                            print("Invalid move generated by AI. Skipping turn.")
+                            state.skip_turn()
+                        else:
+                            old_tile, new_tile = state.get_move_tiles(move)
+                            state.add_moving_piece(move.piece)
 
                             if is_valid_move(state, old_tile, new_tile):
-                                state.add_moving_piece(old_tile.pieces[-1])
+                                state.record_move(old_tile, new_tile)
                                 old_tile.move_piece(new_tile)
                                 print(
                                     f"AI move successful. Next turn: {state.turn + 1}"
                                 )
                                 state.next_turn()
-                                last_ai_move_time = current_time
                                 if player_has_no_moves(state):
                                     state.open_popup()
 
                             state.remove_moving_piece()
 
-                except Exception as e:
-                    print(f"Unexpected error during AI move: {e}")
-                    traceback.print_exc()
-                    state.next_turn()
-                    last_ai_move_time = current_time  # Update time even on error
+                    except Exception as e:
+                        print(f"Unexpected error during AI move: {e}")
+                        traceback.print_exc()
+                        state.skip_turn()
+                    last_ai_move_time = time.time()
+
+            for event in pg.event.get():
+                if event.type == pg.QUIT:
+                    state.quit()
+                    break
+                if event.type == pg.KEYDOWN:
+                    if event.key == pg.K_ESCAPE:
+                        state.quit()
+                        break
 
                 # Human Move Logic
                 if state.game_mode in ["Human vs Human", "Human vs AI"] and (
@@ -168,21 +167,11 @@ def Hive():
                     if event.type == pg.MOUSEBUTTONUP:
                         state.unclick()
                         if state.moving_piece and state.is_player_turn():
-                            old_tile = next(
-                                tile
-                                for tile in state.board_tiles
-                                if tile.has_pieces()
-                                and tile.pieces[-1] == state.moving_piece
-                            )
-                            new_tile = next(
-                                (
-                                    tile
-                                    for tile in state.board_tiles
-                                    if tile.under_mouse(pos)
-                                ),
-                                None,
-                            )
+                            # pieces remember the centre of the tile they're on
+                            old_tile = state.tile_at(state.moving_piece.old_pos)
+                            new_tile = state.tile_at(pos)
                             if is_valid_move(state, old_tile, new_tile):
+                                state.record_move(old_tile, new_tile)
                                 old_tile.move_piece(new_tile)
                                 state.next_turn()
                                 if player_has_no_moves(state):
@@ -191,25 +180,35 @@ def Hive():
                             state.remove_moving_piece()
 
             # Drawing Logic
-            background.fill(BACKGROUND)
-            white_inventory.draw(background, pos)
-            black_inventory.draw(background, pos)
-            for tile in state.board_tiles:
-                if state.clicked:
-                    tile.draw(background, pos, state.clicked)
-                    if (
-                        tile.under_mouse(pos)
-                        and state.moving_piece is None
-                        and tile.has_pieces()
-                    ):
-                        state.add_moving_piece(tile.pieces[-1])
-                else:
-                    tile.draw(background, pos)
-            if state.moving_piece:
-                draw_drag(background, pos, state.moving_piece)
-            state.turn_panel.draw(background, state.turn)
-            screen.blit(background, (0, 0))
-            pg.display.flip()
+            draw_start = time.perf_counter()
+            hovered = state.tile_at(pos)
+            if (
+                state.clicked
+                and state.moving_piece is None
+                and hovered is not None
+                and hovered.has_pieces()
+            ):
+                state.add_moving_piece(hovered.pieces[-1])
+            updated_areas += view.draw(
+                pos, hovered, state.clicked, state.turn, state.moving_piece
+            )
+
+            draw_time += time.perf_counter() - draw_start
+            drawn_frames += 1
+            if drawn_frames == FPS:
+                if DRAW_TIMING:
+                    pieces = sum(len(tile.pieces) for tile in state.board_tiles)
+                    print(
+                        f"draw {draw_time / drawn_frames * 1000:.2f} ms/frame,"
+                        f" {pieces} pieces, {updated_areas / drawn_frames:.1f}"
+                        " areas updated per frame"
+                    )
+                draw_time = 0.0
+                drawn_frames = 0
+                updated_areas = 0
+
+            # don't spin faster than needed, the AI search shares the CPU
+            clock.tick(FPS)
 
             if game_is_over(state):
                 state.end_game()
@@ -220,6 +219,7 @@ def Hive():
                 if event.type == pg.QUIT:
                     state.quit()
                     break
+            clock.tick(FPS)
     return state.play_new_game
 
 
@@ -0,0 +1,213 @@
+"""
+Incrementally updated version of AIPlayer._evaluate_position
+
+Material, the occupied neighbour count of every hex (which gives the queen
+surround counts and the "controls multiple spaces" bonus), where the queens,
+beetles, spiders and ants are, and the blocking bonus of
+_evaluate_piece_positions are kept up to date as moves are made and taken
+back. A leaf evaluation then only looks at a fixed number of hexes, however
+large the board or the hive is.
+"""
+
+from engine import Queen, Beetle, Spider, Ant
+from hexarray import count_between
+
+
+class IncrementalEvaluation:
+    def __init__(self, ai, state):
+        self.ai = ai
+        self.color = ai.color
+
+        self.neighbor_counts = {}  # occupied neighbours of every hex
+        self.material = 0
+        self.control = 0  # friendly pieces with 3+ occupied neighbours
+        self.blocking = 0  # friendly beetles/spiders between enemies and queen
+        self.friendly_count = 0
+
+        # top pieces by kind
+        self.friendly_queen = None
+        self.enemy_queen = None
+        self.friendly_beetles = set()
+        self.friendly_spiders = set()
+        self.friendly_ants = 0
+        self.enemy_tops = set()
+
+        board = state.board
+        for coords in board.occupied():
+            for neighbor in board.neighbors(coords):
+                self.neighbor_counts[neighbor] = (
+                    self.neighbor_counts.get(neighbor, 0) + 1
+                )
+        for coords in board.occupied():
+            self._track(board, coords)
+            self._add_cell_score(board, coords, 1)
+        self.blocking = self._full_blocking()
+
+    def make(self, state, move):
+        """state.make(move), keeping the terms up to date"""
+        self._update(state, move, state.make)
+
+    def unmake(self, state, move):
+        """state.unmake(move), keeping the terms up to date"""
+        self._update(state, move, state.unmake)
+
+    def _update(self, state, move, apply):
+        if move is None:  # a pass only changes the turn
+            apply(move)
+            return
+
+        board = state.board
+        moved = [coords for coords in (move.src, move.dst) if coords is not None]
+
+        # take out everything the move can change...
+        old_queen = self.enemy_queen
+        full_blocking = old_queen in moved
+        if not full_blocking:
+            self.blocking -= self._blocking_of(moved)
+        was_occupied = [board.has_pieces(coords) for coords in moved]
+        for coords in moved:
+            self._add_cell_score(board, coords, -1)
+            self._untrack(board, coords)
+
+        apply(move)
+
+        # ...and put it back for the new position, hexes that were emptied or
+        # filled change the neighbour counts around them
+        for coords, occupied_before in zip(moved, was_occupied):
+            if board.has_pieces(coords) != occupied_before:
+                self._count_neighbors(
+                    board, coords, moved, -1 if occupied_before else 1
+                )
+        for coords in moved:
+            self._track(board, coords)
+            self._add_cell_score(board, coords, 1)
+        if full_blocking or self.enemy_queen != old_queen:
+            self.blocking = self._full_blocking()
+        else:
+            self.blocking += self._blocking_of(moved)
+
+    def _count_neighbors(self, board, coords, moved, change):
+        for neighbor in board.neighbors(coords):
+            count = self.neighbor_counts.get(neighbor, 0)
+            self.neighbor_counts[neighbor] = count + change
+
+            # the moved hexes are scored again afterwards anyway
+            if neighbor in moved or (count >= 3) == (count + change >= 3):
+                continue
+            piece = board.top(neighbor)
+            if piece is not None and piece.color == self.color:
+                self.control += 30 * change
+
+    def _track(self, board, coords):
+        """Record the top piece of coords in the piece lists"""
+        self._track_piece(board.top(coords), coords, 1)
+
+    def _untrack(self, board, coords):
+        self._track_piece(board.top(coords), coords, -1)
+
+    def _track_piece(self, piece, coords, sign):
+        if piece is None:
+            return
+        add = sign > 0
+        if piece.color == self.color:
+            self.friendly_count += sign
+            if isinstance(piece, Queen):
+                self.friendly_queen = coords if add else None
+            elif isinstance(piece, Beetle):
+                self._set_member(self.friendly_beetles, coords, add)
+            elif isinstance(piece, Spider):
+                self._set_member(self.friendly_spiders, coords, add)
+            elif isinstance(piece, Ant):
+                self.friendly_ants += sign
+        else:
+            self._set_member(self.enemy_tops, coords, add)
+            if isinstance(piece, Queen):
+                self.enemy_queen = coords if add else None
+
+    def _set_member(self, members, coords, add):
+        if add:
+            members.add(coords)
+        else:
+            members.discard(coords)
+
+    def _add_cell_score(self, board, coords, sign):
+        piece = board.top(coords)
+        if piece is None:
+            return
+        if piece.color == self.color:
+            self.material += sign * self.ai.piece_values[piece.name]
+            if self.neighbor_counts.get(coords, 0) >= 3:
+                self.control += sign * 30
+        else:
+            self.material -= sign * self.ai.piece_values[piece.name]
+
+    def _blocking_of(self, cells):
+        """Blocking bonus of every (friendly, enemy) pair with a piece on cells"""
+        queen = self.enemy_queen
+        if queen is None:
+            return 0
+        score = 0
+        for coords in self.friendly_beetles | self.friendly_spiders:
+            if coords in cells:
+                enemies = self.enemy_tops
+            else:
+                enemies = [x for x in cells if x in self.enemy_tops]
+            for enemy_coords in enemies:
+                if self.ai._is_between(coords, enemy_coords, queen):
+                    score += 50
+        return score
+
+    def _full_blocking(self):
+        if self.enemy_queen is None:
+            return 0
+        blockers = self.friendly_beetles | self.friendly_spiders
+        return 50 * count_between(blockers, self.enemy_tops, self.enemy_queen)
+
+    def evaluate(self, state):
+        """AIPlayer._evaluate_position of the current state (up to float rounding)"""
+        ai = self.ai
+        board = state.board
+        friendly_queen = self.friendly_queen
+        enemy_queen = self.enemy_queen
+
+        # Game ending conditions take highest priority
+        if enemy_queen and self.neighbor_counts.get(enemy_queen, 0) == 6:
+            return float("inf")
+        if friendly_queen and self.neighbor_counts.get(friendly_queen, 0) == 6:
+            return float("-inf")
+
+        score = self.material
+        if friendly_queen:
+            score += ai._evaluate_queen_safety(board, friendly_queen, True)
+        if enemy_queen:
+            score += self._attack_potential(board, enemy_queen)
+            score -= ai._evaluate_queen_safety(board, enemy_queen, False) * 0.5
+
+        if state.turn <= 6:
+            if not friendly_queen and state.turn >= 4:
+                score -= 500
+            score += self.friendly_count * 20
+
+        if enemy_queen:
+            score += self.blocking + self.control
+        return score
+
+    def _attack_potential(self, board, enemy_queen):
+        """AIPlayer._evaluate_attack_potential from the tracked pieces"""
+        distance = self.ai._calculate_distance
+        score = 50 * self.friendly_ants
+        for coords in self.friendly_beetles:
+            beetle_distance = distance(coords, enemy_queen)
+            if beetle_distance <= 2:
+                score += 200 / (beetle_distance + 1)
+        for coords in self.friendly_spiders:
+            spider_distance = distance(coords, enemy_queen)
+            if spider_distance <= 3:
+                score += 100 / (spider_distance + 1)
+
+        our_adjacent_pieces = sum(
+            1
+            for c in board.neighbors(enemy_queen)
+            if board.has_pieces(c) and board.top(c).color == self.color
+        )
+        return score + our_adjacent_pieces * 100
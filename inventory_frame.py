@@ -137,7 +137,6 @@ class Inventory_Frame:
             pg.draw.rect(background, self.color, self.tile_rects[i])
 
         background.blit(self.font, self.title_rect)
-        pg.display.flip()
 
     def get_piece(self, piece_type):
         """
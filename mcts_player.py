@@ -0,0 +1,328 @@
+"""
+Monte Carlo tree search player
+
+MCTSPlayer plays through the same interface as AIPlayer, with UCT in place of
+alpha-beta. Every iteration walks down the tree by the UCB1 score of the
+children, adds one node, plays a short random game from it and credits the
+result to every node on the way back. Random games pick a piece first and
+then one of its destinations, so only that piece's moves are generated, and
+stop after rollout_plies plies, where AIPlayer's evaluation is turned into a
+chance of winning (or the game is scored as a draw, without
+rollout_evaluation).
+
+The search runs until the time budget of the move is used up or, when
+iterations is set, after that many iterations. The tree is kept after a move
+and the node of the position the opponent left is searched on next turn.
+With workers > 1 every worker process grows a tree of its own from another
+seed and the visits of the root moves are added up (root parallelisation).
+"""
+
+import math
+import random
+from engine import Move, Position
+from engine.rules import (
+    game_is_over,
+    movable_pieces,
+    placement_destinations,
+    turn_allows_move,
+)
+from ai_player import AIPlayer
+from incremental_eval import IncrementalEvaluation
+from time_manager import TimeManager
+import parallel_search
+
+# UCB1 exploration constant, for results between 0 and 1
+EXPLORATION = 1.4
+
+# plies of a random game before it is scored
+ROLLOUT_PLIES = 8
+
+# evaluation lead that is worth a 73% (1 / (1 + e^-1)) chance of winning
+EVALUATION_SCALE = 300
+
+_worker_players = {}
+
+
+def random_move(game, rng):
+    """
+    A legal move of the player to move, None when there is none
+
+    A piece is picked first and then one of its destinations, so only the
+    moves of the picked pieces are generated.
+    """
+    color = game.get_current_player_color()
+    board = game.board
+    pieces = movable_pieces(game, color)
+    rng.shuffle(pieces)
+    targets = None
+    pinned = None
+    for piece, old in pieces:
+        if not turn_allows_move(game, piece, old):
+            continue
+        if old is None:
+            if targets is None:
+                targets = placement_destinations(game, color)
+            if targets:
+                return Move(piece, None, rng.choice(targets))
+            continue
+        if pinned is None:
+            pinned = board.pinned()
+        if old in pinned:
+            continue
+        destinations = list(piece.destinations(board, old))
+        if destinations:
+            return Move(piece, old, rng.choice(destinations))
+    return None
+
+
+class Node:
+    __slots__ = (
+        "move",
+        "parent",
+        "key",
+        "color",
+        "children",
+        "untried",
+        "visits",
+        "wins",
+    )
+
+    def __init__(self, move, parent, key, color):
+        self.move = move  # the move that led here, None for a pass and the root
+        self.parent = parent
+        self.key = key  # position key after move
+        self.color = color  # the side that made move
+        self.children = []
+        self.untried = None  # moves not expanded yet, from the first visit on
+        self.visits = 0
+        self.wins = 0.0  # sum of the results for color
+
+    def select(self):
+        """The child with the highest UCB1 score"""
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + EXPLORATION * math.sqrt(log_visits / child.visits),
+        )
+
+    def most_visited(self):
+        return max(self.children, key=lambda child: (child.visits, child.wins))
+
+
+class MCTSPlayer(AIPlayer):
+    def __init__(self, color, difficulty=2, tt_size=0, workers=1, seed=None):
+        super().__init__(color, difficulty, tt_size, workers)
+        self.rng = random.Random(seed)
+        self.iterations = None  # iterations per move, None to use the time
+        self.rollout_plies = ROLLOUT_PLIES
+        self.rollout_evaluation = True  # score unfinished random games
+        self.tree = None  # node of the position after our last move
+        self.reused = 0  # visits of the tree kept from the last move
+
+    def _search(self, state, valid_moves):
+        if self.workers > 1 and len(valid_moves) > 1:
+            return self._root_parallel(state, valid_moves)
+
+        root = self._grow(state, valid_moves, self.iterations)
+        if not root.children:
+            self.tree = None
+            return valid_moves[0]
+        best = root.most_visited()
+        best.parent = None
+        self.tree = best
+        return self._match_move(best.move, valid_moves)
+
+    def _grow(self, state, valid_moves, iterations):
+        """Search state until the budget runs out and return the root node"""
+        root = self._reuse_tree(state)
+        if root is None:
+            root = Node(None, None, self._position_key(state), None)
+            root.untried = list(valid_moves)
+            self.rng.shuffle(root.untried)
+        self.reused = root.visits
+
+        self.evaluator = IncrementalEvaluation(self, state)
+        while iterations is None or self.nodes < iterations:
+            self._iterate(state, root)
+            self.nodes += 1
+            if self.timer.expired():
+                break
+        self.evaluator = None
+
+        self.pv = []
+        node = root
+        while node.children:
+            node = node.most_visited()
+            self.pv.append(node.move)
+        return root
+
+    def _reuse_tree(self, state):
+        """
+        The node of state in the tree kept from the last move, if the opponent
+        made a move that was searched, with its moves bound to state's pieces
+        """
+        tree, self.tree = self.tree, None
+        if tree is None:
+            return None
+        key = self._position_key(state)
+        node = next((node for node in [tree] + tree.children if node.key == key), None)
+        if node is None:
+            return None
+        node.parent = None
+        self._bind_tree(state, node)
+        return node
+
+    def _bind_tree(self, state, node):
+        """Point the moves of node's subtree at state's piece objects"""
+        if node.untried is not None:
+            node.untried = [self._bind(state, move) for move in node.untried]
+        for child in node.children:
+            child.move = self._bind(state, child.move)
+            state.make(child.move)
+            self._bind_tree(state, child)
+            state.unmake(child.move)
+
+    def _bind(self, state, move):
+        if move is None:
+            return None
+        if move.src is not None:
+            piece = state.board.top(move.src)
+        else:
+            piece = next(
+                piece
+                for piece in state.hand(move.piece.color)
+                if piece.name == move.piece.name
+            )
+        return move if piece is move.piece else Move(piece, move.src, move.dst)
+
+    def _iterate(self, state, root):
+        """Select, expand, play out and back up once"""
+        node = root
+        path = []
+        while node.untried == [] and node.children:
+            node = node.select()
+            self._make_move(state, node.move)
+            path.append(node.move)
+
+        over = game_is_over(state)
+        if not over:
+            if node.untried is None:
+                node.untried = self._get_valid_moves(state) or [None]
+                self.rng.shuffle(node.untried)
+            move = node.untried.pop()
+            color = state.get_current_player_color()
+            self._make_move(state, move)
+            path.append(move)
+            child = Node(move, node, self._position_key(state), color)
+            node.children.append(child)
+            node = child
+            over = game_is_over(state)
+
+        result = self._rollout(state, over)
+        for move in reversed(path):
+            self._undo_move(state, move)
+
+        while node is not None:
+            node.visits += 1
+            node.wins += result if node.color == self.color else 1 - result
+            node = node.parent
+
+    def _rollout(self, state, over):
+        """Play a random game on from state and return our chance of winning"""
+        moves = []
+        while not over and len(moves) < self.rollout_plies:
+            move = random_move(state, self.rng)
+            self._make_move(state, move)
+            moves.append(move)
+            over = game_is_over(state)
+
+        if over:
+            result = 0.5 if state.winner is None else float(state.winner == self.color)
+        elif self.rollout_evaluation:
+            result = self._win_chance(self._evaluate(state))
+        else:
+            result = 0.5
+        for move in reversed(moves):
+            self._undo_move(state, move)
+        return result
+
+    def _win_chance(self, score):
+        if score == float("inf"):
+            return 1.0
+        if score == float("-inf"):
+            return 0.0
+        return 1 / (1 + math.exp(-score / EVALUATION_SCALE))
+
+    def _root_parallel(self, state, valid_moves):
+        """Add up the root visits of a tree grown on every worker process"""
+        workers = self.workers
+        iterations = None
+        if self.iterations is not None:
+            iterations = -(-self.iterations // workers)
+        position = Position.from_game(state)
+        futures = [
+            parallel_search.get_pool(workers).submit(
+                _grow_share,
+                (type(self), self.color, self.difficulty),
+                position,
+                iterations,
+                self.rollout_plies,
+                self.rollout_evaluation,
+                max(0, self.timer.remaining()),
+                self.rng.randrange(1 << 32),
+            )
+            for _ in range(workers)
+        ]
+
+        visits = {}
+        for future in futures:
+            root_visits, nodes = future.result()
+            self.nodes += nodes
+            for key, count in root_visits:
+                visits[key] = visits.get(key, 0) + count
+        self.tree = None
+        if not visits:
+            return valid_moves[0]
+        moves_by_key = {self._move_key(move): move for move in valid_moves}
+        best = moves_by_key[max(visits, key=visits.get)]
+        self.pv = [best]
+        return best
+
+    def _reset_search(self):
+        super()._reset_search()
+        self.reused = 0
+
+    def search_stats(self):
+        """Iteration counts of the last get_best_move"""
+        return {
+            "nodes": self.nodes,
+            "reused": self.reused,
+            "depth": len(self.pv),
+            "pv": [self._move_key(move) if move else None for move in self.pv],
+            "seconds": self.timer.elapsed() if self.timer is not None else 0,
+            "book": self.book_move,
+        }
+
+
+def _grow_share(
+    settings, position, iterations, rollout_plies, rollout_evaluation, time_limit, seed
+):
+    """Worker side: grow a tree of position, return its root visits by move key"""
+    game = position.to_game()
+    player = _worker_players.get(settings)
+    if player is None:
+        player_type, color, difficulty = settings
+        player = _worker_players[settings] = player_type(color, difficulty)
+    player.rollout_plies = rollout_plies
+    player.rollout_evaluation = rollout_evaluation
+    player.timer = TimeManager(time_limit)
+    player.rng.seed(seed)
+    player.tree = None
+
+    player._reset_search()
+    root = player._grow(game, player._get_valid_moves(game), iterations)
+    root_visits = [
+        (player._move_key(child.move), child.visits) for child in root.children
+    ]
+    return root_visits, player.nodes
@@ -0,0 +1,279 @@
+"""
+Opening book of the AI players
+
+    python opening_book.py results.jsonl games.txt --plies 12 --output opening.book
+
+Positions are keyed by a hash of their symmetry normalized form: the stacks
+are turned and mirrored in each of the twelve ways the hex grid allows and
+shifted so their first hex is (0, 0), and the smallest of the twelve is
+hashed together with the turn. Openings that only differ by where the hive
+started or which way it faces share one entry, and the book moves are kept
+in that normalized frame.
+
+The book is built offline from game records, tournament JSON lines (with
+their "moves") or one game in Hive notation per line like RECORD_FILE. Every
+game is replayed to its end and each move of its first --plies plies is
+credited with the points (1 for a win, 0.5 for a draw or an unfinished game)
+the side that made it scored, except for the random plies tournament games
+open with. The file is a header and fixed size records sorted by key, loaded
+the first time an AIPlayer asks for a book move and then searched by
+bisection.
+
+A position is played from the book when one of its moves was played in at
+least MIN_GAMES games, the move with the best average (counting one extra
+win and one extra loss, so a single lucky game doesn't make a book move)
+is played without searching.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from engine import Game, Position, valid_moves, game_is_over
+from engine.hexgrid import SYMMETRIES, transform, inverse
+from engine.position import piece_code
+from engine.record import GameRecord, split_moves
+
+BOOK_FILE = os.path.join(os.path.dirname(__file__), "opening.book")
+
+# plies of every game that go into the book
+BOOK_PLIES = 10
+
+# games a move must have been played in to be played from the book
+MIN_GAMES = 2
+
+# header: magic and number of records, a record: key, piece code, source
+# (NO_SOURCE for a placement) and destination in the normalized frame, games
+# and points counted in halves
+MAGIC = b"HVBK"
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<QB4bHH")
+NO_SOURCE = (-128, -128)
+MAX_COUNT = 0xFFFF
+
+_books = {}
+
+
+def normalize(position):
+    """
+    (key, symmetry, origin) of a position
+
+    The normalized form of a hex is transform(coords, symmetry) minus origin.
+    """
+    best = None
+    for symmetry in SYMMETRIES:
+        stacks = sorted(
+            (transform(coords, symmetry), codes) for coords, codes in position.stacks
+        )
+        if stacks:
+            origin = stacks[0][0]
+        else:
+            origin = transform(position.start, symmetry)
+        form = tuple(
+            ((q - origin[0], r - origin[1]), codes) for (q, r), codes in stacks
+        )
+        if best is None or form < best[0]:
+            best = (form, symmetry, origin)
+
+    form, symmetry, origin = best
+    data = bytearray(struct.pack("<H", position.turn))
+    for (q, r), codes in form:
+        data += struct.pack("<hhB", q, r, len(codes)) + codes
+    key = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+    return key, symmetry, origin
+
+
+def _to_book(coords, symmetry, origin):
+    (q, r) = transform(coords, symmetry)
+    return (q - origin[0], r - origin[1])
+
+
+def _from_book(coords, symmetry, origin):
+    return transform((coords[0] + origin[0], coords[1] + origin[1]), inverse(symmetry))
+
+
+class OpeningBook:
+    def __init__(self, data=b""):
+        self.data = data  # the records, sorted by key
+        self.keys = array("Q", (record[0] for record in RECORD.iter_unpack(data)))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as book_file:
+            data = book_file.read()
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + count * RECORD.size:
+            raise ValueError(f"{path} is not an opening book")
+        return cls(data[HEADER.size :])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def entries(self, key):
+        """(piece code, source, destination, games, points) of the moves of key"""
+        index = bisect_left(self.keys, key)
+        entries = []
+        while index < len(self.keys) and self.keys[index] == key:
+            _, code, sq, sr, dq, dr, games, half_points = RECORD.unpack_from(
+                self.data, index * RECORD.size
+            )
+            src = None if (sq, sr) == NO_SOURCE else (sq, sr)
+            entries.append((code, src, (dq, dr), games, half_points / 2))
+            index += 1
+        return entries
+
+    def move(self, game, min_games=MIN_GAMES):
+        """The book move of the position of game, None when it has none"""
+        key, symmetry, origin = normalize(Position.from_game(game))
+        entries = [entry for entry in self.entries(key) if entry[3] >= min_games]
+        if not entries:
+            return None
+        legal = None
+        for code, src, dst, games, points in sorted(
+            entries, key=lambda entry: -(entry[4] + 1) / (entry[3] + 2)
+        ):
+            if src is not None:
+                src = _from_book(src, symmetry, origin)
+            dst = _from_book(dst, symmetry, origin)
+            if legal is None:
+                legal = valid_moves(game)
+            move = next(
+                (
+                    move
+                    for move in legal
+                    if move.src == src
+                    and move.dst == dst
+                    and piece_code(move.piece) == code
+                ),
+                None,
+            )
+            if move is not None:
+                return move
+        return None
+
+
+def load_book(path):
+    """
+    The book in path, read on first use, None while there is no such file
+
+    A missing file isn't cached, so a book built later on is picked up.
+    """
+    book = _books.get(path)
+    if book is None and os.path.exists(path):
+        book = _books[path] = OpeningBook.read(path)
+    return book
+
+
+def count_moves(games, plies=BOOK_PLIES, counts=None, skip=0):
+    """
+    Add up the book moves of games, lists of moves in notation
+
+    The first skip plies of every game, e.g. the random opening of a
+    tournament game, are played but not counted.
+
+    Returns counts, {(key, piece code, source, destination): [games, points]}
+    with the hexes in the normalized frame of key.
+    """
+    if counts is None:
+        counts = {}
+    for moves in games:
+        game = Game()
+        record = GameRecord()
+        played = []
+        for ply, text in enumerate(moves):
+            counted = skip <= ply < plies
+            if counted:
+                key, symmetry, origin = normalize(Position.from_game(game))
+            move = record.play(game, text)
+            if counted and move is not None:
+                src = None
+                if move.src is not None:
+                    src = _to_book(move.src, symmetry, origin)
+                dst = _to_book(move.dst, symmetry, origin)
+                played.append(((key, piece_code(move.piece), src, dst), move))
+            if game_is_over(game):
+                break
+
+        over = game.winner is not None
+        for entry, move in played:
+            counts.setdefault(entry, [0, 0.0])
+            counts[entry][0] += 1
+            if not over:
+                counts[entry][1] += 0.5
+            elif game.winner == move.piece.color:
+                counts[entry][1] += 1
+    return counts
+
+
+def write_book(path, counts, min_games=1):
+    """Store the moves of counts played in at least min_games games"""
+    records = []
+    for (key, code, src, dst), (games, points) in counts.items():
+        if games < min_games:
+            continue
+        # counts that don't fit are scaled down, which keeps the average
+        scale = min(1, MAX_COUNT / (2 * games))
+        records.append(
+            (
+                key,
+                code,
+                *(NO_SOURCE if src is None else src),
+                *dst,
+                round(games * scale),
+                round(points * 2 * scale),
+            )
+        )
+    records.sort()
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, len(records)))
+        book_file.writelines(RECORD.pack(*record) for record in records)
+    _books.pop(path, None)
+    return len(records)
+
+
+def read_records(path):
+    """
+    Yield (moves, random plies) of every game in a record or tournament
+    results file, the random plies only come with tournament games
+    """
+    with open(path) as record_file:
+        for line in record_file:
+            line = line.strip()
+            random_plies = 0
+            if line.startswith("{"):
+                result = json.loads(line)
+                line = result.get("moves", "")
+                random_plies = result.get("random_plies", 0)
+            if line:
+                yield split_moves(line), random_plies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("records", nargs="+", help="game records or JSON lines")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES)
+    parser.add_argument("--min-games", type=int, default=1)
+    parser.add_argument("--output", default=BOOK_FILE)
+    args = parser.parse_args(argv)
+
+    counts = {}
+    games = 0
+    for path in args.records:
+        for moves, random_plies in read_records(path):
+            try:
+                count_moves([moves], args.plies, counts, random_plies)
+            except ValueError as error:
+                print(f"{path}: skipped game, {error}", file=sys.stderr)
+                continue
+            games += 1
+    stored = write_book(args.output, counts, args.min_games)
+    positions = len({entry[0] for entry in counts})
+    print(f"{games} games, {positions} positions, {stored} moves -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
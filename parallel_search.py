@@ -0,0 +1,179 @@
+"""
+Root-split parallel search for AIPlayer
+
+The root moves are dealt out to a pool of worker processes, each of which
+runs the normal iterative deepening search over its share. The best move is
+taken from the deepest iteration that every worker finished, so the scores
+being compared come from searches of the same depth.
+
+Workers keep one AIPlayer per setting between moves, so their transposition
+tables carry over from one search to the next like the serial one does. The
+position is sent to them as an engine Position, which pickles to a few
+hundred bytes where a Game carries its whole board.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from engine import Position
+from time_manager import TimeManager
+
+_pools = {}
+_worker_players = {}
+
+
+def get_pool(workers):
+    """Process pool with the given number of workers, started once and reused"""
+    pool = _pools.get(workers)
+    if pool is None:
+        # spawn, the pygame process may be running threads when it searches
+        pool = _pools[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return pool
+
+
+def _load_search():
+    import ai_player  # noqa: F401 (imported for its side effect of loading)
+
+
+def start(workers):
+    """Start the worker processes ahead of the first search"""
+    pool = get_pool(workers)
+    for future in [pool.submit(_load_search) for _ in range(workers)]:
+        future.result()
+
+
+def shutdown():
+    """Stop every worker process"""
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
+
+
+def _settings(ai):
+    return (
+        type(ai),
+        ai.color,
+        ai.difficulty,
+        ai.tt.size if ai.tt is not None else 0,
+    )
+
+
+def _search_share(
+    settings, position, move_keys, max_depth, quiescence_depth, time_limit
+):
+    """Worker side: search the root moves in move_keys of position"""
+    game = position.to_game()
+    player = _worker_players.get(settings)
+    if player is None:
+        player_type, color, difficulty, tt_size = settings
+        player = _worker_players[settings] = player_type(color, difficulty, tt_size)
+    player.max_depth = max_depth
+    player.quiescence_depth = quiescence_depth
+    player.time_limit = time_limit
+    player.timer = TimeManager(time_limit)
+
+    player._reset_search()
+    moves = [
+        move
+        for move in player._get_valid_moves(game)
+        if player._move_key(move) in move_keys
+    ]
+    if moves:
+        player._iterative_deepening(game, moves)
+    completed = [
+        (depth, player._move_key(move), score)
+        for depth, move, score in player.completed
+    ]
+    pv = [player._move_key(move) if move else None for move in player.pv]
+    return completed, player.nodes, player.quiescence_nodes, player.depth_nodes, pv
+
+
+def best_move(ai, state, valid_moves):
+    """
+    Search valid_moves of state on ai.workers processes, in what is left of
+    ai.timer's budget
+
+    Fills in ai.nodes, ai.quiescence_nodes, ai.depth_nodes, ai.completed and
+    ai.pv like a serial search.
+    """
+    # deal the moves out in search order so every worker gets some good ones
+    ordered = ai._order_moves(state, valid_moves, 0, None)
+    workers = min(ai.workers, len(ordered))
+    shares = [ordered[index::workers] for index in range(workers)]
+
+    time_left = max(0, ai.timer.remaining())
+    position = Position.from_game(state)
+    futures = [
+        get_pool(ai.workers).submit(
+            _search_share,
+            _settings(ai),
+            position,
+            {ai._move_key(move) for move in share},
+            ai.max_depth,
+            ai.quiescence_depth,
+            time_left,
+        )
+        for share in shares
+    ]
+    results = [future.result() for future in futures]
+
+    moves_by_key = {ai._move_key(move): move for move in valid_moves}
+    depth_nodes = []
+    for completed, nodes, quiescence_nodes, worker_depth_nodes, _ in results:
+        ai.nodes += nodes
+        ai.quiescence_nodes += quiescence_nodes
+        for depth, count in enumerate(worker_depth_nodes):
+            if depth < len(depth_nodes):
+                depth_nodes[depth] += count
+            else:
+                depth_nodes.append(count)
+    ai.depth_nodes = depth_nodes
+
+    # deepest iteration finished by every worker
+    depth = min((completed[-1][0] if completed else 0) for completed, *_ in results)
+    if depth == 0:
+        return ordered[0]
+
+    for current in range(1, depth + 1):
+        best = max(
+            (
+                (score, key)
+                for completed, *_ in results
+                for completed_depth, key, score in completed
+                if completed_depth == current
+            ),
+            key=lambda entry: entry[0],
+        )
+        ai.completed.append((current, moves_by_key[best[1]], best[0]))
+
+    # the line of the worker that found the best move, if it stopped there
+    best_move = ai.completed[-1][1]
+    ai.pv = [best_move]
+    for completed, *_, pv in results:
+        if completed[-1][0] == depth and pv and pv[0] == ai._move_key(best_move):
+            ai.pv = _line(ai, state, pv)
+    return best_move
+
+
+def _line(ai, state, keys):
+    """Moves of state for a line of move keys, as far as they are legal"""
+    moves = []
+    for key in keys:
+        move = None
+        if key is not None:
+            move = next(
+                (
+                    move
+                    for move in ai._get_valid_moves(state)
+                    if ai._move_key(move) == key
+                ),
+                None,
+            )
+            if move is None:
+                break
+        state.make(move)
+        moves.append(move)
+    for move in reversed(moves):
+        state.unmake(move)
+    return moves
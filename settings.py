@@ -19,3 +19,17 @@ START_COLOR = (15, 23, 42)  # Dark navy for start screen
 # Window Dimensions
 WIDTH = 880
 HEIGHT = 900
+
+# Frame rate cap of the game loop
+FPS = 60
+
+# Print the average time spent drawing a frame, once a second
+DRAW_TIMING = False
+
+# Append the moves of every finished game (in Hive notation) to this file,
+# None to not save them
+RECORD_FILE = None
+
+# Search of the AI players, "minimax" (alpha-beta) or "mcts" (Monte Carlo
+# tree search)
+AI_ENGINE = "minimax"
@@ -1,7 +1,9 @@
+import math
 import numpy as np
 import pygame as pg
 from pieces import Queen, Grasshopper, Spider, Beetle, Ant
 from settings import WHITE, RED, BLUE
+from engine.hexgrid import DIRECTIONS, neighbor_table, hex_round
 
 
 class Tile:
@@ -14,13 +16,16 @@ class Tile:
         self.hex_select = get_hex_points(coord_pair, radius * 1.1)
         self.color = color
         self.adjacent_tiles = []
+        self.board = None  # set by Game_State so piece changes reach the engine
         if piece:
             self.pieces = [piece]
         else:
             self.pieces = []
 
-    def draw(self, surface, pos, clicked=False):
-        if self.under_mouse(pos):
+    def draw(self, surface, pos, clicked=False, hovered=None):
+        if hovered is None:
+            hovered = self.under_mouse(pos)
+        if hovered:
             if clicked:
                 pg.draw.polygon(surface, RED, self.hex)
             else:
@@ -38,7 +43,10 @@ class Tile:
             return False
 
     def add_piece(self, piece):
-        self.pieces.append(piece)
+        if self.board is not None:
+            self.board.add_piece(self.axial_coords, piece)
+        else:
+            self.pieces.append(piece)
         self.pieces[-1].update_pos(self.coords)
         self.color = self.pieces[-1].color
 
@@ -70,21 +78,9 @@ class Tile:
                 return True
         return False
 
-    def set_adjacent_tiles(self, board_tiles):  # tiles don't move, only pieces do
-        (q, r) = self.axial_coords
-        adjacent_tiles = []
-        for tile in board_tiles:
-            if tile.axial_coords in [
-                (q, r - 1),
-                (q + 1, r - 1),
-                (q + 1, r),
-                (q, r + 1),
-                (q - 1, r + 1),
-                (q - 1, r),
-            ]:
-                adjacent_tiles.append(tile)
-
-        self.adjacent_tiles = adjacent_tiles
+    # tiles don't move, only pieces do
+    def set_adjacent_tiles(self, tiles_by_coords, table):
+        self.adjacent_tiles = [tiles_by_coords[x] for x in table[self.axial_coords]]
 
     def remove_piece(self):
         """
@@ -93,7 +89,10 @@ class Tile:
         :return: Removed piece or None
         """
         if self.has_pieces():
-            removed_piece = self.pieces.pop(-1)
+            if self.board is not None:
+                removed_piece = self.board.remove_piece(self.axial_coords)
+            else:
+                removed_piece = self.pieces.pop(-1)
 
             # Reset color if no pieces remain
             if not self.has_pieces():
@@ -137,11 +136,72 @@ class Start_Tile(Tile):
         super().__init__(coord_pair, axial_coords, radius, BLUE, piece)
 
 
+class Tile_Locator:
+    """
+    Finds the tile under a screen position without checking every tile
+
+    Board tiles sit on a lattice, so the position is converted to fractional
+    axial coordinates and rounded to the nearest hex. That hex and its
+    neighbours are the only board tiles that can be under the mouse, the
+    few inventory tiles are checked when the position is near them.
+    """
+
+    def __init__(self, tiles):
+        self.order = {tile: index for index, tile in enumerate(tiles)}
+        self.tiles_by_coords = {
+            tile.axial_coords: tile
+            for tile in tiles
+            if type(tile) is not Inventory_Tile
+        }
+        self.inventory_tiles = [tile for tile in tiles if type(tile) is Inventory_Tile]
+        areas = [
+            pg.Rect(0, 0, 2 * tile.radius, 2 * tile.radius).move(
+                tile.coords[0] - tile.radius, tile.coords[1] - tile.radius
+            )
+            for tile in self.inventory_tiles
+        ]
+        self.inventory_area = areas[0].unionall(areas) if areas else pg.Rect(0, 0, 0, 0)
+
+        # screen position of hex (0, 0) and the screen steps of q and r
+        self.origin = None
+        if all(c in self.tiles_by_coords for c in [(0, 0), (1, 0), (0, 1)]):
+            (x0, y0) = self.origin = self.tiles_by_coords[(0, 0)].coords
+            (qx, qy) = self.tiles_by_coords[(1, 0)].coords
+            (rx, ry) = self.tiles_by_coords[(0, 1)].coords
+            self.q_step = (qx - x0, qy - y0)
+            self.r_step = (rx - x0, ry - y0)
+
+    def pixel_to_axial(self, pos):
+        """Fractional axial coordinates of a screen position"""
+        (x, y) = (pos[0] - self.origin[0], pos[1] - self.origin[1])
+        (a, c), (b, d) = self.q_step, self.r_step
+        det = a * d - b * c
+        return (d * x - b * y) / det, (a * y - c * x) / det
+
+    def tile_at(self, pos):
+        """
+        The tile under_mouse(pos) is true for, None if there is none
+
+        When two tiles' edges overlap the one that comes first in tiles is
+        returned, like a scan over all of them would.
+        """
+        found = []
+        if self.origin is not None:
+            (q, r) = hex_round(*self.pixel_to_axial(pos))
+            for dq, dr in ((0, 0),) + DIRECTIONS:
+                tile = self.tiles_by_coords.get((q + dq, r + dr))
+                if tile is not None and tile.under_mouse(pos):
+                    found.append(tile)
+        if not found and self.inventory_area.collidepoint(pos):
+            found = [tile for tile in self.inventory_tiles if tile.under_mouse(pos)]
+        return min(found, key=self.order.get, default=None)
+
+
 # Existing utility functions
 def distance(pair_one, pair_two):
     (x1, y1) = pair_one
     (x2, y2) = pair_two
-    return np.sqrt((x1 - x2) * (x1 - x2) + (y1 - y2) * (y1 - y2))
+    return math.hypot(x1 - x2, y1 - y2)
 
 
 def get_hex_points(coord_pair, radius):
@@ -200,11 +260,14 @@ def initialize_grid(height, width, radius):
                         )
                     )
 
+    # one neighbour lookup per tile instead of a scan over the whole grid
+    tiles_by_coords = {tile.axial_coords: tile for tile in tiles}
+    table = neighbor_table(tiles_by_coords)
     for tile in tiles:
-        tile.set_adjacent_tiles(tiles)
+        tile.set_adjacent_tiles(tiles_by_coords, table)
 
     return tiles
 
 
 def draw_drag(background, pos, piece=None):
-    pg.draw.line(background, pg.Color("red"), pos, piece.old_pos)
+    return pg.draw.line(background, pg.Color("red"), pos, piece.old_pos)
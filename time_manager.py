@@ -0,0 +1,80 @@
+"""
+Time management of the AI search
+
+A TimeManager is made for every move. Its budget is the per-move time limit
+of the difficulty, or less when the player has a game clock: the time left on
+it spread over the moves still to come, plus the increment. The search asks
+it for the time only once every POLL_NODES nodes, on the monotonic clock, and
+iterative deepening asks it before every depth whether that depth is likely
+to finish in time, going by how much longer each depth took than the last.
+"""
+
+import time
+
+# search depth and seconds per move of each difficulty
+DIFFICULTY_LIMITS = {1: (2, 2), 2: (4, 2), 3: (6, 2), 4: (8, 5)}
+
+# the search reads the clock once every POLL_NODES nodes, a power of two
+POLL_NODES = 256
+POLL_MASK = POLL_NODES - 1
+
+# moves a game clock is spread over, counting down as the game goes on
+MOVES_TO_GO = 30
+MIN_MOVES_TO_GO = 8
+
+# bounds of how many times longer the next depth is assumed to take
+MIN_GROWTH = 2.0
+MAX_GROWTH = 8.0
+
+
+def difficulty_limits(difficulty):
+    """(max depth, seconds per move) of a difficulty"""
+    return DIFFICULTY_LIMITS[max(1, min(difficulty, 4))]
+
+
+def move_budget(time_limit, clock=None, increment=0, turn=1):
+    """
+    Seconds to spend on the move of turn
+
+    clock is the time left on the player's game clock, None for no clock,
+    and increment what is added to it after every move.
+    """
+    if clock is None:
+        return time_limit
+    moves_to_go = max(MIN_MOVES_TO_GO, MOVES_TO_GO - turn // 2)
+    # whatever the increment, never stake half of what is left on one move
+    return max(0, min(time_limit, clock / moves_to_go + increment, clock / 2))
+
+
+class TimeManager:
+    def __init__(self, budget):
+        self.budget = budget
+        self.start = time.monotonic()
+        self.deadline = self.start + budget
+        self.iteration_start = self.start
+        self.iteration_times = []  # seconds taken by each finished depth
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def expired(self):
+        return time.monotonic() >= self.deadline
+
+    def start_iteration(self):
+        self.iteration_start = time.monotonic()
+
+    def end_iteration(self):
+        self.iteration_times.append(time.monotonic() - self.iteration_start)
+
+    def next_iteration_fits(self):
+        """Whether the next depth is likely to finish before the deadline"""
+        times = self.iteration_times
+        if not times:
+            return not self.expired()
+        growth = MIN_GROWTH
+        if len(times) > 1 and times[-2] > 0:
+            growth = min(max(growth, times[-1] / times[-2]), MAX_GROWTH)
+        return self.elapsed() + times[-1] * growth <= self.budget
@@ -0,0 +1,216 @@
+"""
+Headless self-play tournament between two AIPlayer settings
+
+    python tournament.py --games 40 --player-a difficulty=2 \\
+        --player-b difficulty=2,max_depth=3 --processes 4 --output results.jsonl
+
+Settings are comma separated AIPlayer attributes (difficulty, tt_size,
+workers, max_depth, time_limit, clock and increment in seconds for a game
+clock instead of a fixed time per move, and book_file, empty to play without
+an opening book). engine=mcts plays with an
+MCTSPlayer, which also takes iterations, rollout_plies and
+rollout_evaluation. Players swap colours every game and the first
+--random-plies plies of each game are random (seeded by the game number), so
+the games don't all repeat the same line. Each finished game is
+written as one JSON line, with its moves in Hive notation (see
+engine.record), the summary reports the score of player A with an Elo
+estimate and 95% confidence intervals.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ai_player import AIPlayer
+from mcts_player import MCTSPlayer
+from engine import Game, valid_moves, game_is_over
+from engine.record import GameRecord
+from settings import PIECE_WHITE, PIECE_BLACK
+
+# settings passed to the constructor, the rest are set as attributes
+CONSTRUCTOR_SETTINGS = ("difficulty", "tt_size", "workers")
+
+# player class of each engine setting
+ENGINES = {"minimax": AIPlayer, "mcts": MCTSPlayer}
+
+
+def parse_settings(text):
+    """'difficulty=2,time_limit=1.5' -> {'difficulty': 2, 'time_limit': 1.5}"""
+    settings = {}
+    for item in filter(None, text.split(",")):
+        name, _, value = item.partition("=")
+        try:
+            number = float(value)
+        except ValueError:
+            settings[name.strip()] = value.strip()
+            continue
+        settings[name.strip()] = int(number) if number.is_integer() else number
+    return settings
+
+
+def make_player(color, settings):
+    player = ENGINES[settings.get("engine", "minimax")](
+        color,
+        **{name: settings[name] for name in CONSTRUCTOR_SETTINGS if name in settings},
+    )
+    for name, value in settings.items():
+        if name not in CONSTRUCTOR_SETTINGS and name != "engine":
+            setattr(player, name, value)
+    return player
+
+
+def _move_order(move):
+    return (move.piece.name, str(move.src), move.dst)
+
+
+def play_game(index, settings_a, settings_b, random_plies, max_turns):
+    """Play one game, player A has white in even numbered games"""
+    a_color = PIECE_WHITE if index % 2 == 0 else PIECE_BLACK
+    b_color = PIECE_BLACK if a_color == PIECE_WHITE else PIECE_WHITE
+    players = {
+        a_color: ("A", make_player(a_color, settings_a)),
+        b_color: ("B", make_player(b_color, settings_b)),
+    }
+    stats = {"A": {"moves": 0, "time": 0.0, "nodes": 0}}
+    stats["B"] = dict(stats["A"])
+
+    rnd = random.Random(index)
+    game = Game()
+    record = GameRecord()
+    over = False
+    while not over and game.turn <= max_turns:
+        if game.turn <= random_plies:
+            moves = sorted(valid_moves(game), key=_move_order)
+            move = rnd.choice(moves) if moves else None
+        else:
+            name, player = players[game.get_current_player_color()]
+            start = time.perf_counter()
+            move = player.get_best_move(game)
+            stats[name]["time"] += time.perf_counter() - start
+            stats[name]["moves"] += 1
+            stats[name]["nodes"] += player.nodes
+        record.add(game, move)
+        game.make(move)
+        over = game_is_over(game)
+
+    if not over or game.winner is None:
+        result = "draw"
+    else:
+        result = players[game.winner][0]
+    return {
+        "game": index,
+        "a_color": "white" if a_color == PIECE_WHITE else "black",
+        "result": result,
+        "plies": game.turn - 1,
+        "random_plies": random_plies,
+        "stats": stats,
+        "moves": record.text(),
+    }
+
+
+def score_interval(scores, z=1.96):
+    """Mean of per-game scores with a normal approximation confidence interval"""
+    n = len(scores)
+    mean = sum(scores) / n
+    variance = sum((score - mean) ** 2 for score in scores) / max(n - 1, 1)
+    margin = z * math.sqrt(variance / n)
+    return mean, max(0.0, mean - margin), min(1.0, mean + margin)
+
+
+def elo(score):
+    """Elo difference matching an expected score, infinite for 0 or 1"""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def wilson_interval(wins, n, z=1.96):
+    if n == 0:
+        return 0.0, 0.0
+    p = wins / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return centre - margin, centre + margin
+
+
+def summarize(results, elapsed):
+    n = len(results)
+    wins = sum(1 for result in results if result["result"] == "A")
+    losses = sum(1 for result in results if result["result"] == "B")
+    draws = n - wins - losses
+    scores = [{"A": 1.0, "B": 0.0, "draw": 0.5}[r["result"]] for r in results]
+    score, low, high = score_interval(scores)
+    win_low, win_high = wilson_interval(wins, n)
+
+    lines = [
+        f"games {n}: A wins {wins}, B wins {losses}, draws {draws}",
+        f"A score {score:.1%} [{low:.1%}, {high:.1%}]"
+        f", win rate {wins / n:.1%} [{win_low:.1%}, {win_high:.1%}]",
+        f"Elo A - B {elo(score):+.0f} [{elo(low):+.0f}, {elo(high):+.0f}]",
+        f"plies per game {sum(r['plies'] for r in results) / n:.1f}"
+        f", {n / elapsed * 3600:.0f} games/hour",
+    ]
+    for name in ("A", "B"):
+        moves = sum(r["stats"][name]["moves"] for r in results)
+        if moves:
+            seconds = sum(r["stats"][name]["time"] for r in results)
+            nodes = sum(r["stats"][name]["nodes"] for r in results)
+            lines.append(
+                f"{name}: {seconds / moves:.3f} s/move, {nodes / moves:.0f} nodes/move"
+                f", {nodes / seconds if seconds else 0:.0f} nodes/s"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--player-a", type=parse_settings, default={})
+    parser.add_argument("--player-b", type=parse_settings, default={})
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--random-plies", type=int, default=4)
+    parser.add_argument("--max-turns", type=int, default=200)
+    parser.add_argument("--output", default=None, help="JSON lines file of games")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    output = open(args.output, "w") if args.output else None
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        futures = [
+            pool.submit(
+                play_game,
+                index,
+                args.player_a,
+                args.player_b,
+                args.random_plies,
+                args.max_turns,
+            )
+            for index in range(args.games)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(
+                f"game {result['game']}: {result['result']}"
+                f" in {result['plies']} plies",
+                file=sys.stderr,
+            )
+            if output:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+    if output:
+        output.close()
+
+    print(summarize(results, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
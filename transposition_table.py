@@ -0,0 +1,69 @@
+from collections import namedtuple
+
+# bound types of a stored score
+EXACT = 0
+LOWER = 1  # search failed high, the real score is at least this
+UPPER = 2  # search failed low, the real score is at most this
+
+Entry = namedtuple("Entry", ["key", "depth", "flag", "score", "move", "age"])
+
+
+class TranspositionTable:
+    """
+    Fixed size table of search results indexed by Zobrist key
+
+    A slot keeps the deeper of two results for the same search, entries left
+    over from earlier searches are always replaced.
+    """
+
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.slots = [None] * size
+        self.age = 0
+
+        # counters for measuring how much the table saves
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0  # slot held a different position
+        self.stores = 0
+
+    def new_search(self):
+        """Start a new search so entries of the previous one can be replaced"""
+        self.age += 1
+
+    def probe(self, key):
+        entry = self.slots[key % self.size]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.key != key:
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, flag, score, move):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None or entry.age != self.age or depth >= entry.depth:
+            self.slots[index] = Entry(key, depth, flag, score, move, self.age)
+            self.stores += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+        }
@@ -21,12 +21,18 @@ class Turn_Panel:
             self.inner_left, self.inner_top, self.inner_width, self.inner_height
         )
 
-    def draw(self, background, turn):
+        # the panel is redrawn often, so the titles are rendered once
         FONT = pg.font.SysFont("Times New Norman", 32)
+        self.titles = (
+            FONT.render("Player 1 Turn:", True, WHITE),
+            FONT.render("Player 2 Turn:", True, WHITE),
+        )
+
+    def draw(self, background, turn):
         if turn % 2 == 1:  # turn starts at 1
-            font = FONT.render("Player 1 Turn:", True, WHITE)
+            font = self.titles[0]
         else:
-            font = FONT.render("Player 2 Turn:", True, WHITE)
+            font = self.titles[1]
         title_rect = font.get_rect(
             center=(
                 self.inner_left + self.inner_width * (2 / 5),
@@ -59,4 +65,3 @@ class Turn_Panel:
             )
 
         background.blit(font, title_rect)
-        pg.display.flip()